@@ -1,86 +1,95 @@
 # -*- coding: utf-8 -*-
-import os, sys, json, shutil, subprocess, time, re, threading, tempfile
-import winreg
+import time
+
+_T0 = time.perf_counter()
+
+import os, sys, json, threading
+from collections import OrderedDict, deque
 from pathlib import Path
-from urllib import request
 
-from PyQt5.QtCore import Qt, QPoint, QTimer, pyqtSignal, QObject
-from PyQt5.QtGui import QPixmap, QIcon, QCursor, QPainter, QColor, QPen, QFont
+
+class StartupProfile:
+    """Wall-clock time per startup phase, printed by `rTool --profile-startup`."""
+
+    def __init__(self, t0: float):
+        self.t0 = self.last = t0
+        self.phases = []
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, round((now - self.last) * 1000, 1)))
+        self.last = now
+
+    def report(self, out_file: Path = None) -> str:
+        total = round((self.last - self.t0) * 1000, 1)
+        width = max(len(p) for p, _ in self.phases + [("total", 0)])
+        lines = [f"{p:<{width}}  {ms:8.1f} ms" for p, ms in self.phases]
+        lines.append(f"{'total':<{width}}  {total:8.1f} ms")
+        if out_file is not None:
+            try:
+                out_file.parent.mkdir(parents=True, exist_ok=True)
+                out_file.write_text(json.dumps({"phases": self.phases, "total_ms": total}, indent=2), "utf-8")
+            except OSError:
+                pass
+        return "\n".join(lines)
+
+
+_PROFILE = None
+_INSTANCE = None
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        _PROFILE = StartupProfile(_T0)
+
+    if len(sys.argv) > 1:
+        # Headless subcommands ("rTool import x.zip", "rTool list --json") never load Qt.
+        import rtool_cli
+
+        if sys.argv[1] in rtool_cli.COMMANDS:
+            sys.exit(rtool_cli.main(sys.argv[1:]))
+
+    import rtool_ipc
+
+    _INSTANCE = rtool_ipc.Instance()
+    if _PROFILE:
+        _INSTANCE = None  # a profiling run never forwards to, or blocks, a real instance
+    elif not _INSTANCE.acquire():
+        # Explorer starts one process per selected item: hand the paths to the
+        # running instance and leave before Qt is even loaded.
+        # The primary instance has its own cwd: send absolute paths.
+        _paths = [os.path.abspath(p) for p in sys.argv[1:]]
+        if _INSTANCE.forward(_paths):
+            sys.exit(0)
+        if _paths:
+            import rtool_cli
+
+            sys.exit(rtool_cli.main(["import", *_paths]))
+        sys.exit(1)
+
+if _PROFILE: _PROFILE.mark("interpreter + instance check")
+
+from PyQt5.QtCore import (
+    Qt, QPoint, QSize, QTimer, QBuffer, QIODevice, pyqtSignal, QObject, QFileSystemWatcher,
+    QAbstractListModel, QModelIndex
+)
+from PyQt5.QtGui import QPixmap, QImage, QIcon, QCursor, QPainter, QColor, QPen, QFont
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QMenu, QAction, QFileDialog, QMessageBox,
+    QAbstractItemView, QApplication, QWidget, QMenu, QAction, QFileDialog, QMessageBox,
     QSystemTrayIcon, QStyle, QDialog, QVBoxLayout, QHBoxLayout,
-    QLineEdit, QListWidget, QListWidgetItem, QPushButton
+    QLineEdit, QListView, QPushButton, QProgressDialog, QPlainTextEdit
 )
 
-# =========================
-#   AUTO UPDATE (GitHub)
-# =========================
-OWNER = "fallizzy"
-REPO = "rTool"
-APP_VERSION = "1.0.2"
-
-def ver_tuple(v: str):
-    """Turn version like 1.2.3 or v1.2 into (1,2,3). Missing parts -> 0."""
-    nums = re.findall(r"\d+", v or "")
-    nums = (nums + ["0", "0", "0"])[:3]
-    return tuple(int(x) for x in nums)
-
-
-
-def _http_json(url: str):
-    req = request.Request(url, headers={
-        "Accept": "application/vnd.github+json",
-        "User-Agent": f"{REPO}-updater"
-    })
-    with request.urlopen(req, timeout=12) as r:
-        return json.load(r)
-
-
-def get_latest_release_info():
-    api = f"https://api.github.com/repos/{OWNER}/{REPO}/releases/latest"
-    data = _http_json(api)
-
-    tag = (data.get("tag_name") or "").strip()
-    latest = tag.lstrip("v").strip()
-    body = (data.get("body") or "").strip()
-
-    assets = data.get("assets") or []
-    setup = None
-    for a in assets:
-        name = (a.get("name") or "").lower()
-        if name.endswith(".exe") and ("setup" in name or "installer" in name or "rtool" in name):
-            setup = a
-            break
-    if not setup:
-        for a in assets:
-            name = (a.get("name") or "").lower()
-            if name.endswith(".exe"):
-                setup = a
-                break
-
-    url = setup.get("browser_download_url") if setup else ""
-    setup_name = setup.get("name") if setup else ""
-
-    return {
-        "latest": latest,
-        "tag": tag,
-        "body": body,
-        "setup_url": url,
-        "setup_name": setup_name
-    }
-
-
-def download_and_run_setup(url: str, filename_hint: str = "rTool-Setup.exe"):
-    def _download_thread():
-        try:
-            out = os.path.join(tempfile.gettempdir(), filename_hint or "rTool-Setup.exe")
-            request.urlretrieve(url, out)
-            subprocess.Popen([out], shell=False)
-        except Exception:
-            pass
+from rtool_core import (
+    APP_VERSION, UPDATE_CHECK_INTERVAL, RTOOL_DIR, STATE_FILE, STEAM_DEFAULT, TARGET_NAME, TRASH_DIR,
+    ver_tuple, get_latest_release_info, download_and_run_setup, get_tool_path_for_run,
+    load_json, save_json, ensure_dir, open_path, is_lua, is_manifest, is_archive,
+    import_app_list, cached_game_name, NameResolver, _NAME_CACHE, METRICS, METRICS_LOG, HTTP,
+    move_to_trash, trash_batches, restore_trash_batch, prune_trash, export_files,
+    dir_snapshot, GameIndex, diff_ranges, Library, ARTWORK, SteamSupervisor, RESOURCES,
+)
 
-    t = threading.Thread(target=_download_thread, daemon=True)
-    t.start()
+if _PROFILE: _PROFILE.mark("import PyQt5 + rtool_core")
 
 
 # =========================
@@ -89,6 +98,18 @@ def download_and_run_setup(url: str, filename_hint: str = "rTool-Setup.exe"):
 class UpdateSignals(QObject):
     update_checked = pyqtSignal(bool, str, object)  # Manual check
     update_found_auto = pyqtSignal(object)  # Startup auto check
+    download_progress = pyqtSignal(int, int)  # bytes done, total (0 = unknown)
+    download_done = pyqtSignal(bool, str)
+
+
+class ToolSignals(QObject):
+    app_list_imported = pyqtSignal(bool, str)
+    name_resolved = pyqtSignal(str, str)
+    import_progress = pyqtSignal(int, int)
+    import_finished = pyqtSignal(object)
+    bulk_finished = pyqtSignal(object)
+    paths_forwarded = pyqtSignal(object)
+    steam_state = pyqtSignal(str, str)
 
 
 # =========================
@@ -109,6 +130,7 @@ class RegistryManager:
         if not exe_path.lower().endswith(".exe"):
             return False, "This feature requires the compiled .exe version."
 
+        import winreg
         command_val = f'"{exe_path}" "%1"'
         icon_val = exe_path
 
@@ -126,6 +148,7 @@ class RegistryManager:
             return False, f"Error: {e}"
 
     def remove_context_menu(self):
+        import winreg
         try:
             for loc in self.LOCATIONS:
                 key_path = f"{loc}\\{self.KEY_NAME}"
@@ -143,174 +166,298 @@ class RegistryManager:
 
 
 # =========================
-#   APP CONFIG
+#   FOLDER WATCHER
 # =========================
-STEAM_DEFAULT = r"C:\Program Files (x86)\Steam"
-TARGET_NAME = "spprt.exe"
-
-RTOOL_DIR = Path(os.getenv("PROGRAMDATA", r"C:\ProgramData")) / "rTool"
-RTOOL_DIR.mkdir(parents=True, exist_ok=True)
-
-APPDATA_DIR = Path(os.getenv("PROGRAMDATA", r"C:\ProgramData")) / "rTool"
-APPDATA_DIR.mkdir(parents=True, exist_ok=True)
-STATE_FILE = APPDATA_DIR / "state.json"
-NAME_CACHE_FILE = APPDATA_DIR / "name_cache.json"
-NESTED_MAX_DEPTH = 6
+class FolderWatcher(QObject):
+    """Watches folders and reports debounced batches of changed file names.
+
+    Uses QFileSystemWatcher where possible and falls back to polling stat
+    snapshots. Either way a burst of events becomes one `changed` emit with
+    {folder: {names}} (added, modified and removed files).
+    """
+    changed = pyqtSignal(object)
+    DEBOUNCE_MS = 500
+    POLL_MS = 4000
+
+    def __init__(self, parent=None, mode: str = "auto"):
+        super().__init__(parent)
+        self.mode = mode
+        self._folders = []
+        self._snapshots = {}
+        self._polled = set()
+        self._dirty = set()
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._flush)
+
+        self._poll = QTimer(self)
+        self._poll.setInterval(self.POLL_MS)
+        self._poll.timeout.connect(self._on_poll)
+
+        self._fs = None
+        if mode == "auto":
+            self._fs = QFileSystemWatcher(self)
+            self._fs.directoryChanged.connect(self._on_dir_changed)
+
+    def set_folders(self, folders):
+        if self._fs is not None and self._fs.directories():
+            self._fs.removePaths(self._fs.directories())
+        self._folders = [f for f in folders if f]
+        self._snapshots = {f: dir_snapshot(f) for f in self._folders}
+        self._polled = set()
+        self._dirty = set()
+        if self.mode == "off":
+            self._poll.stop()
+            return
+        for f in self._folders:
+            if self._fs is None or not self._fs.addPath(f):
+                self._polled.add(f)
+        if self._polled:
+            self._poll.start()
+        else:
+            self._poll.stop()
+
+    def _on_dir_changed(self, path: str):
+        # Restart the timer on every event so a bulk copy ends up as one batch.
+        self._dirty.add(os.path.normpath(path))
+        self._debounce.start(self.DEBOUNCE_MS)
+
+    def _on_poll(self):
+        for f in self._polled:
+            if dir_snapshot(f) != self._snapshots.get(f):
+                self._dirty.add(os.path.normpath(f))
+        if self._dirty:
+            self._debounce.start(self.DEBOUNCE_MS)
+
+    def _flush(self):
+        batch = {}
+        for f in self._folders:
+            if os.path.normpath(f) not in self._dirty:
+                continue
+            old = self._snapshots.get(f, {})
+            new = dir_snapshot(f)
+            self._snapshots[f] = new
+            names = {n for n, v in new.items() if old.get(n) != v}
+            names.update(n for n in old if n not in new)
+            if names:
+                batch[f] = names
+            # A deleted and recreated folder silently drops out of the watch list.
+            watched = {os.path.normpath(d) for d in self._fs.directories()} if self._fs is not None else set()
+            if self._fs is not None and f not in self._polled and os.path.normpath(f) not in watched:
+                if not self._fs.addPath(f):
+                    self._polled.add(f)
+                    self._poll.start()
+        self._dirty = set()
+        if batch:
+            self.changed.emit(batch)
 
 
 # =========================
-#   HELPERS
+#   THUMBNAILS
 # =========================
-def load_json(path: Path, default):
-    try:
-        if path.exists():
-            return json.loads(path.read_text("utf-8"))
-    except Exception:
-        pass
-    return default
-
-
-def save_json(path: Path, data):
-    try:
-        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), "utf-8")
-    except Exception:
-        pass
-
-
-def ensure_dir(p: str):
-    try:
-        os.makedirs(p, exist_ok=True)
-    except Exception:
-        pass
-
-
-def open_path(p: str) -> bool:
-    try:
-        if p and os.path.exists(p):
-            os.startfile(p)
-            return True
-    except Exception:
-        pass
-    return False
-
-
-def is_lua(p: str) -> bool:
-    return (p or "").lower().endswith(".lua")
-
-
-def is_manifest(p: str) -> bool:
-    low = (p or "").lower()
-    return low.endswith(".manifest") or low.endswith(".mfst")
-
-
-def iter_files_limited(root: str, max_depth: int = 6):
-    rootp = Path(root)
-    if rootp.is_file():
-        yield str(rootp)
-        return
-    if not rootp.exists():
-        return
-    base = rootp.resolve()
-    for dirpath, dirnames, filenames in os.walk(str(base)):
-        try:
-            rel = Path(dirpath).resolve().relative_to(base)
-            if len(rel.parts) >= max_depth:
-                dirnames[:] = []
-        except Exception:
-            pass
-        for fn in filenames:
-            yield str(Path(dirpath) / fn)
-
-
-def extract_appid_from_lua(path: str) -> str:
-    try:
-        t = open(path, "r", encoding="utf-8", errors="ignore").read()
-        for pat in (
-                r"addappid\s*\(\s*(\d+)",
-                r"setmanifestid\s*\(\s*(\d+)",
-                r"app[_\s-]*id\s*[:=]\s*(\d+)",
-                r"\b(\d{4,7})\b",
-        ):
-            m = re.search(pat, t, re.IGNORECASE)
-            if m:
-                return m.group(1)
-    except Exception:
-        pass
-    return ""
-
-
-def get_tool_path_for_run(target_name: str) -> str:
-    if hasattr(sys, "_MEIPASS"):
-        base = Path(sys._MEIPASS)
-        src = base / target_name
-        if not src.exists():
-            src = base / "bin" / target_name
-        if not src.exists():
-            return ""
-        out_dir = RTOOL_DIR / "cache"
-        out_dir.mkdir(parents=True, exist_ok=True)
-        dst = out_dir / target_name
-        try:
-            shutil.copy2(src, dst)
-        except Exception:
-            pass
-        return str(dst)
-    exe = Path(__file__).parent / target_name
-    if exe.exists():
-        return str(exe)
-    return ""
-
-
-_NAME_CACHE = load_json(NAME_CACHE_FILE, {})
-
-
-def req_json(url: str, timeout=2):
-    req = request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with request.urlopen(req, timeout=timeout) as resp:
-        return json.load(resp)
+class Thumbnails(QObject):
+    """Pre-scaled artwork pixmaps for the search list, loaded on demand.
+
+    get() answers from memory only; a miss queues the app for the worker
+    threads, which read the scaled copy from ARTWORK (or scale the source
+    image once and store the result) and emit `ready`. Newest requests are
+    served first so the rows on screen win over ones scrolled past.
+    """
+    ready = pyqtSignal(str, QImage)
+    SIZE = QSize(64, 30)  # store header images are 460x215
+    KIND = "thumb64.png"
+    MAX_PIXMAPS = 600
+    MAX_QUEUE = 64
+
+    def __init__(self, online: bool = True, workers: int = 2, parent=None):
+        super().__init__(parent)
+        self.online = online
+        self.placeholder = QPixmap(self.SIZE)
+        self.placeholder.fill(Qt.transparent)
+        self._pixmaps = OrderedDict()  # appid -> QPixmap, or None when the app has no artwork
+        self._queue = deque()
+        self._pending = set()
+        self._cv = threading.Condition()
+        self.ready.connect(self._on_ready)
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"rtool-thumbs-{i}", daemon=True).start()
+
+    def get(self, appid: str):
+        if appid in self._pixmaps:
+            self._pixmaps.move_to_end(appid)
+            return self._pixmaps[appid] or self.placeholder
+        with self._cv:
+            if appid not in self._pending:
+                self._pending.add(appid)
+                self._queue.append(appid)
+                if len(self._queue) > self.MAX_QUEUE:
+                    self._pending.discard(self._queue.popleft())  # asked again if it scrolls back in
+                self._cv.notify()
+        return self.placeholder
+
+    def forget(self, appid: str):
+        self._pixmaps.pop(appid, None)
+
+    def _on_ready(self, appid, img):
+        self._pixmaps[appid] = None if img.isNull() else QPixmap.fromImage(img)
+        if len(self._pixmaps) > self.MAX_PIXMAPS:
+            self._pixmaps.popitem(last=False)
+
+    def _worker(self):
+        while True:
+            with self._cv:
+                while not self._queue:
+                    self._cv.wait()
+                appid = self._queue.pop()
+            try:
+                img = self._load(appid)
+            except Exception as ex:
+                METRICS.error("thumbnail", ex, appid)
+                img = QImage()
+            with self._cv:
+                self._pending.discard(appid)
+            self.ready.emit(appid, img)
+
+    def _load(self, appid: str) -> QImage:
+        fp = ARTWORK.path(appid, self.KIND)
+        if fp:
+            return QImage(fp)
+        src = ARTWORK.source(appid, self.online)
+        img = QImage(src) if src else QImage()
+        if img.isNull():
+            return img
+        img = img.scaled(self.SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        buf = QBuffer()
+        buf.open(QIODevice.WriteOnly)
+        img.save(buf, "PNG")
+        ARTWORK.put(appid, bytes(buf.data()), self.KIND)
+        return img
 
 
-def get_game_name(appid: str) -> str:
-    if not appid: return ""
-    if appid in _NAME_CACHE and _NAME_CACHE[appid]:
-        return _NAME_CACHE[appid]
-    url = f"https://store.steampowered.com/api/appdetails?appids={appid}&cc=us&l=en"
-    for _ in range(3):
-        try:
-            data = req_json(url, timeout=6)
-            block = data.get(str(appid))
-            if block and block.get("success") and isinstance(block.get("data"), dict):
-                name = (block["data"].get("name") or "").strip()
-                if name:
-                    _NAME_CACHE[appid] = name
-                    save_json(NAME_CACHE_FILE, _NAME_CACHE)
-                    return name
-        except Exception:
-            time.sleep(0.35)
-    return f"App {appid}"
+# =========================
+#   GAME LIST MODEL
+# =========================
+class GameListModel(QAbstractListModel):
+    """List model over a GameIndex; only rows the view asks for get formatted.
+
+    Filtering emits row insert/remove ranges when the new result is a
+    narrowing or widening of the old one, and falls back to a reset
+    otherwise, for long lists, and whenever the index renumbered its
+    entries.
+    """
+    MAX_DIFF_RANGES = 48
+    MAX_DIFF_ROWS = 5000
+
+    def __init__(self, index: GameIndex, parent=None, thumbs: Thumbnails = None):
+        super().__init__(parent)
+        self.index_ = index
+        self.thumbs = thumbs
+        self._rows = []
+        self._epoch = index.epoch
+        self._query = ""
+        self._fg = QColor(242, 242, 242)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, idx, role=Qt.DisplayRole):
+        if not idx.isValid() or idx.row() >= len(self._rows):
+            return None
+        e = self._rows[idx.row()]
+        if role == Qt.DisplayRole:
+            return f"{self.index_.names[e]}  ({self.index_.ids[e]})"
+        if role == Qt.UserRole:
+            return self.index_.ids[e]
+        if role == Qt.ForegroundRole:
+            return self._fg
+        if role == Qt.DecorationRole and self.thumbs is not None:
+            # Only asked for rows being painted, so only visible rows load artwork.
+            return self.thumbs.get(self.index_.ids[e])
+        return None
+
+    def appid_at(self, row: int) -> str:
+        if 0 <= row < len(self._rows):
+            return self.index_.ids[self._rows[row]]
+        return ""
+
+    def set_query(self, text: str):
+        q = (text or "").strip()
+        narrowing = (self._query and q.startswith(self._query) and not q.isdigit()
+                     and self._epoch == self.index_.epoch)
+        self._query = q
+        self._apply_rows(self.index_.search(q, self._rows if narrowing else None))
+
+    def refresh(self):
+        """Re-run the current query after the index changed."""
+        self._apply_rows(self.index_.search(self._query))
+        if self._rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1))
+
+    def _apply_rows(self, new):
+        old = self._rows
+        if self._epoch != self.index_.epoch or max(len(old), len(new)) > self.MAX_DIFF_ROWS:
+            # Old rows hold renumbered entries, or diffing would cost more than a reset.
+            self._epoch = self.index_.epoch
+            self.beginResetModel()
+            self._rows = new
+            self.endResetModel()
+            return
+        if new == old:
+            return
+        root = QModelIndex()
+        ranges = diff_ranges(old, new, self.MAX_DIFF_RANGES)
+        if ranges is not None:
+            for first, last in reversed(ranges):
+                self.beginRemoveRows(root, first, last)
+                del old[first:last + 1]
+                self.endRemoveRows()
+            return
+        ranges = diff_ranges(new, old, self.MAX_DIFF_RANGES)
+        if ranges is not None:
+            for first, last in ranges:
+                self.beginInsertRows(root, first, last)
+                old[first:first] = new[first:last + 1]
+                self.endInsertRows()
+            return
+        self.beginResetModel()
+        self._rows = new
+        self.endResetModel()
 
 
 # =========================
 #   SEARCH DIALOG
 # =========================
 class GameSearchDialog(QDialog):
-    def __init__(self, parent, games_items):
+    SHORT_QUERY_MS = 150
+
+    def __init__(self, parent, games_index, thumbs: Thumbnails = None):
         super().__init__(parent)
         self.setWindowTitle("Search Games")
         self.setModal(True)
         self.resize(520, 560)
 
-        self.all = games_items[:]
-        self.all.sort(key=lambda x: x[0].lower())
+        self.games_index = games_index
+        self.thumbs = thumbs
+        self.model = GameListModel(self.games_index, self, thumbs)
 
         lay = QVBoxLayout(self)
         lay.setContentsMargins(12, 12, 12, 12)
         lay.setSpacing(10)
 
         self.edit = QLineEdit()
-        self.edit.setPlaceholderText("Type to filter...")
-        self.list = QListWidget()
+        self.edit.setPlaceholderText("Search name or app id...")
+        self.list = QListView()
         self.list.setUniformItemSizes(True)
+        self.list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list.setModel(self.model)
+        if thumbs is not None:
+            self.list.setIconSize(Thumbnails.SIZE)
+            self._repaint = QTimer(self)
+            self._repaint.setSingleShot(True)
+            self._repaint.setInterval(60)
+            self._repaint.timeout.connect(self.list.viewport().update)
+            thumbs.ready.connect(self._repaint.start)
 
         row = QHBoxLayout()
         self.btn_open = QPushButton("Actions")
@@ -326,67 +473,156 @@ class GameSearchDialog(QDialog):
         self.setStyleSheet("""
             QDialog { background: #0f0f0f; color: #f2f2f2; }
             QLineEdit { background: #151515; border: 1px solid #2a2a2a; border-radius: 10px; padding: 10px; color: #f2f2f2; }
-            QListWidget { background: #111111; border: 1px solid #2a2a2a; border-radius: 12px; color: #f2f2f2; }
-            QListWidget::item { padding: 10px; border-radius: 10px; color: #f2f2f2; }
-            QListWidget::item:selected { background: #1f1f1f; color: #ffffff; }
+            QListView { background: #111111; border: 1px solid #2a2a2a; border-radius: 12px; color: #f2f2f2; }
+            QListView::item { padding: 10px; border-radius: 10px; color: #f2f2f2; }
+            QListView::item:selected { background: #1f1f1f; color: #ffffff; }
             QPushButton { background: #151515; border: 1px solid #2a2a2a; border-radius: 10px; padding: 10px 14px; color: #f2f2f2; }
             QPushButton:hover { background: #1b1b1b; }
         """)
 
         self.btn_close.clicked.connect(self.reject)
         self.btn_open.clicked.connect(self._do_actions)
-        self.edit.textChanged.connect(self._filter)
-        self.list.itemDoubleClicked.connect(lambda _: self._do_actions())
+        # One- and two-letter queries match most of a big library; wait for a
+        # typing pause before running them.
+        self._short_query = QTimer(self)
+        self._short_query.setSingleShot(True)
+        self._short_query.setInterval(self.SHORT_QUERY_MS)
+        self._short_query.timeout.connect(lambda: self._filter(self.edit.text()))
+        self.edit.textChanged.connect(self._on_text)
+        self.list.doubleClicked.connect(lambda _: self._do_actions())
 
         self.list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.list.customContextMenuRequested.connect(self._ctx_menu)
         self._filter("")
 
-    def update_items(self, games_items):
-        self.all = games_items[:]
-        self.all.sort(key=lambda x: x[0].lower())
-        self._filter(self.edit.text())
+    def refresh_results(self):
+        """Called by the owner after it changed the shared GameIndex."""
+        self.model.refresh()
+        self._ensure_current()
+
+    def _on_text(self, text: str):
+        q = text.strip()
+        if 0 < len(q) < 3 and not q.isdigit() and len(self.games_index) > self.model.MAX_DIFF_ROWS:
+            self._short_query.start()
+            return
+        self._short_query.stop()
+        self._filter(text)
 
     def _filter(self, text: str):
-        q = (text or "").strip().lower()
-        self.list.clear()
-        for name, aid in self.all:
-            if q and q not in name.lower():
-                continue
-            it = QListWidgetItem(f"{name}  ({aid})")
-            it.setData(Qt.UserRole, aid)
-            it.setForeground(QColor(242, 242, 242))
-            self.list.addItem(it)
-        if self.list.count() > 0:
-            self.list.setCurrentRow(0)
+        self.model.set_query(text)
+        if self.model.rowCount() > 0:
+            self.list.setCurrentIndex(self.model.index(0))
+
+    def _ensure_current(self):
+        if self.model.rowCount() > 0 and not self.list.currentIndex().isValid():
+            self.list.setCurrentIndex(self.model.index(0))
 
     def _do_actions(self):
-        it = self.list.currentItem()
-        if not it: return
-        aid = it.data(Qt.UserRole)
+        aid = self.model.appid_at(self.list.currentIndex().row())
+        if not aid: return
         self.accept()
         self.parent().open_game_actions(aid)
 
+    def _selected_appids(self):
+        rows = sorted({i.row() for i in self.list.selectionModel().selectedIndexes()})
+        return [aid for aid in (self.model.appid_at(r) for r in rows) if aid]
+
     def _ctx_menu(self, pos):
-        it = self.list.itemAt(pos)
-        if not it: return
-        aid = it.data(Qt.UserRole)
+        idx = self.list.indexAt(pos)
+        if not idx.isValid(): return
+        if not self.list.selectionModel().isSelected(idx):
+            self.list.setCurrentIndex(idx)
+        aids = self._selected_appids()
+        if not aids: return
+        n = len(aids)
+        what = "game" if n == 1 else f"{n} games"
+        owner = self.parent()
         m = QMenu(self)
-        a1 = QAction("Delete (LUA only)", self)
-        a2 = QAction("Delete (LUA + manifests)", self)
-        a1.triggered.connect(lambda: self.parent()._remove_game(aid, False))
-        a2.triggered.connect(lambda: self.parent()._remove_game(aid, True))
+        a1 = QAction(f"Delete {what} (LUA only)", self)
+        a2 = QAction(f"Delete {what} (LUA + manifests)", self)
+        a3 = QAction(f"Export {what}...", self)
+        a1.triggered.connect(lambda: owner.bulk_remove(aids, False))
+        a2.triggered.connect(lambda: owner.bulk_remove(aids, True))
+        a3.triggered.connect(lambda: owner.bulk_export(aids))
         m.addAction(a1);
         m.addAction(a2)
+        m.addSeparator()
+        m.addAction(a3)
+        if n == 1:
+            m.addAction(QAction("Set artwork...", self, triggered=lambda: owner.set_artwork(aids[0])))
         m.exec_(self.list.mapToGlobal(pos))
 
 
+# =========================
+#   DIAGNOSTICS
+# =========================
+class DiagnosticsDialog(QDialog):
+    """Live view of METRICS plus resolver, catalog and cache sizes."""
+    REFRESH_MS = 2000
+
+    def __init__(self, owner):
+        super().__init__(owner)
+        self.owner = owner
+        self.setWindowTitle("rTool Diagnostics")
+        self.resize(620, 480)
+        layout = QVBoxLayout(self)
+        self.text = QPlainTextEdit(self)
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.text)
+        row = QHBoxLayout()
+        b_log = QPushButton("Open Log")
+        b_log.clicked.connect(lambda: open_path(str(METRICS_LOG)))
+        b_close = QPushButton("Close")
+        b_close.clicked.connect(self.close)
+        row.addWidget(b_log)
+        row.addStretch(1)
+        row.addWidget(b_close)
+        layout.addLayout(row)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, e):
+        self.refresh()
+        self._timer.start(self.REFRESH_MS)
+        super().showEvent(e)
+
+    def hideEvent(self, e):
+        self._timer.stop()
+        super().hideEvent(e)
+
+    def refresh(self):
+        snap = METRICS.snapshot()
+        w = self.owner
+        lines = [f"{'span':<22}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name, sp in snap["spans"].items():
+            lines.append(f"{name:<22}{sp['count']:>7}{sp['errors']:>8}"
+                         + "".join(f"{'-' if sp[k] is None else sp[k]:>10}" for k in ("p50", "p95", "max")))
+        lines.append("")
+        lines += [f"{k:<30}{v:>8}" for k, v in sorted(snap["counters"].items())]
+        resolver = getattr(w, "resolver", None)
+        if resolver is not None:
+            st = resolver.stats()
+            lines += ["", f"resolver queue depth          {st['queued'] + st['inflight']:>8}"]
+            lines += [f"resolver {k:<21}{st[k]:>8}" for k in
+                      ("requests", "resolved", "not_found", "errors", "throttled", "rate_limit", "names_per_min")]
+        lines += ["",
+                  f"games                         {len(w.games):>8}",
+                  f"lua files in catalog          {len(w.catalog.files):>8}",
+                  f"manifests in depot index      {len(w.depots.files):>8}",
+                  f"names in cache                {_NAME_CACHE.count():>8}",
+                  f"folder watcher                {w.watcher.mode:>8}"]
+        self.text.setPlainText("\n".join(lines))
+
+
 # =========================
 #   MAIN WIDGET
 # =========================
 class MiniIcon(QWidget):
-    def __init__(self):
+    def __init__(self, profile: StartupProfile = None):
         super().__init__()
+        self._profile = profile
+        self._started = False
 
         self.state = load_json(STATE_FILE, {
             "steam_path": STEAM_DEFAULT,
@@ -397,11 +633,8 @@ class MiniIcon(QWidget):
         self.steam_path = self.state.get("steam_path") or STEAM_DEFAULT
         self.always_on_top = bool(self.state.get("always_on_top", True))
 
-        self.stplugin = os.path.join(self.steam_path, "config", "stplug-in")
-        self.depotcache = os.path.join(self.steam_path, "depotcache")
-        ensure_dir(self.stplugin)
-        ensure_dir(self.depotcache)
-        ensure_dir(str(RTOOL_DIR))
+        self.library = Library(self.steam_path)
+        HTTP.configure(timeout=self.state.get("http_timeout"), proxy=self.state.get("http_proxy"))
 
         self.setAttribute(Qt.WA_TranslucentBackground, True)
         self._apply_window_flags()
@@ -427,7 +660,9 @@ class MiniIcon(QWidget):
         # ICONS LOAD
         self.icon_pm = QPixmap()
         self.default_face_pm = QPixmap()
+        self.face_pm = QPixmap()  # icon_pm or default_face_pm, scaled once for paintEvent
         self.tray_icon = QIcon()
+        self.thumbs = None
         self._load_app_icons()
 
         x, y = self.state.get("pos", [60, 180])
@@ -439,40 +674,105 @@ class MiniIcon(QWidget):
         self.update_signals = UpdateSignals()
         self.update_signals.update_checked.connect(self._on_update_checked)
         self.update_signals.update_found_auto.connect(self._on_auto_update_found)
+        self.update_signals.download_progress.connect(self._on_download_progress)
+        self.update_signals.download_done.connect(self._on_download_done)
+        self._downloading = False
+        self.tool_signals = ToolSignals()
+        self.tool_signals.app_list_imported.connect(self._on_app_list_imported)
+        self.tool_signals.name_resolved.connect(self._on_name_resolved)
+        self.tool_signals.import_progress.connect(self._on_import_progress)
+        self.tool_signals.import_finished.connect(self._on_import_finished)
+        self._import_job = None
+        self._import_queue = []
+        self._import_dlg = None
+        self._import_done_cb = []
+        self._pending_paths = []
+        self._pending_timer = QTimer(self)
+        self._pending_timer.setSingleShot(True)
+        self._pending_timer.timeout.connect(self._flush_pending_paths)
+        self.tool_signals.paths_forwarded.connect(self.enqueue_import)
+        self.tool_signals.bulk_finished.connect(self._on_bulk_finished)
+        self.tool_signals.steam_state.connect(self._on_steam_state)
+        self.steam = SteamSupervisor(self.steam_path, on_state=self.tool_signals.steam_state.emit)
+        self._bulk_busy = False
+        self._names_timer = QTimer(self)
+        self._names_timer.setSingleShot(True)
+        self._names_timer.timeout.connect(self._notify_search)
 
         self.reg_mgr = RegistryManager()
-        self.games = {}
+        self.game_index = GameIndex()
+        self._index_timer = QTimer(self)
+        self._index_timer.setInterval(0)
+        self._index_timer.timeout.connect(self._build_index_step)
         self.search_dlg = None
+        self.watcher = FolderWatcher(self, self.state.get("watch_mode", "auto"))
+        self.watcher.changed.connect(self._on_folders_changed)
 
         self._setup_tray()
-        self.refresh_games()
         self._update_hover_text()
+        # Catalog, watcher, name resolver and the update check start after the
+        # first paint (see _finish_startup).
+
+    def _finish_startup(self):
+        prof = self._profile
+        ensure_dir(str(RTOOL_DIR))
+        self.refresh_games()
+        if prof: prof.mark("catalog + depot index")
+        self.watcher.set_folders([self.stplugin, self.depotcache])
+        if prof: prof.mark("folder watcher")
         self._start_name_resolver()
+        if prof: prof.mark("name cache + resolver")
+        if prof:
+            print(prof.report(RTOOL_DIR / "startup_profile.json"), file=sys.stderr)
+            QApplication.quit()
+            return
+
+        # Bundled tool binary: extracted off the GUI thread, ready for "Run Tool"
+        threading.Thread(target=RESOURCES.warm, daemon=True).start()
 
         # Startup update check
         QTimer.singleShot(1500, self.check_updates_silent)
 
+    games = property(lambda self: self.library.games)
+    catalog = property(lambda self: self.library.catalog)
+    depots = property(lambda self: self.library.depots)
+    stplugin = property(lambda self: self.library.stplugin)
+    depotcache = property(lambda self: self.library.depotcache)
+
     # ================== ICON LOGIC ==================
     def _load_app_icons(self):
-        # Paths to look for icons
-        here = Path(getattr(sys, "_MEIPASS", Path(__file__).parent))
+        # Only the icons are resolved here; the rest of RESOURCES is warmed on a worker.
 
         # 1. Main Window/Tray Icon (ICO)
-        ico_path = here / "steam.ico"
-        if ico_path.exists():
-            self.tray_icon = QIcon(str(ico_path))
+        ico_path = RESOURCES.path("steam.ico")
+        if ico_path:
+            self.tray_icon = QIcon(ico_path)
             self.setWindowIcon(self.tray_icon)
 
         # 2. Default Widget Face (PNG) - The "r" logo
-        face_path = here / "default.png"
-        if face_path.exists():
-            self.default_face_pm = QPixmap(str(face_path))
+        face_path = RESOURCES.path("default.png")
+        if face_path:
+            self.default_face_pm = QPixmap(face_path)
+        self._update_face()
+
+    def _update_face(self):
+        """Scale the widget face once; call after changing icon_pm or default_face_pm."""
+        src = self.icon_pm if not self.icon_pm.isNull() else self.default_face_pm
+        if src.isNull():
+            self.face_pm = QPixmap()
+        else:
+            dpr = self.devicePixelRatioF()
+            self.face_pm = src.scaled(round(32 * dpr), round(32 * dpr), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.face_pm.setDevicePixelRatio(dpr)
+        self.update()
 
     # ================== UPDATE LOGIC ==================
     def check_updates_silent(self):
+        hours = float(self.state.get("update_check_hours", UPDATE_CHECK_INTERVAL / 3600))
+
         def worker():
             try:
-                info = get_latest_release_info()
+                info = get_latest_release_info(min_interval=hours * 3600)
                 latest = info.get("latest") or ""
                 if latest and ver_tuple(latest) > ver_tuple(APP_VERSION):
                     self.update_signals.update_found_auto.emit(info)
@@ -494,16 +794,11 @@ class MiniIcon(QWidget):
         # POPUP ON STARTUP
         latest = info.get("latest", "")
         body = info.get("body", "").strip() or "(No changelog)"
-        url = info.get("setup_url", "")
-        setup_name = info.get("setup_name", "rTool-Setup.exe")
-
         text = f"New version available: v{latest}\n\nChangelog:\n{body}\n\nDo you want to download and install now?"
         res = QMessageBox.question(self, "Update Available", text, QMessageBox.Yes | QMessageBox.No)
 
         if res == QMessageBox.Yes:
-            if url:
-                self._toast("Downloading in background...")
-                download_and_run_setup(url, setup_name)
+            self.download_update(info)
 
     def on_check_updates(self):
         self._toast("Checking...")
@@ -513,7 +808,7 @@ class MiniIcon(QWidget):
             msg = ""
             info = None
             try:
-                info = get_latest_release_info()
+                info = get_latest_release_info(force=True)
                 latest = info.get("latest") or ""
                 if not latest:
                     success = False;
@@ -528,6 +823,8 @@ class MiniIcon(QWidget):
             except Exception as e:
                 success = False;
                 msg = f"Error: {e}"
+            if info and info.get("stale"):
+                msg += " (offline, last known release)"
             self.update_signals.update_checked.emit(success, msg, info)
 
         threading.Thread(target=worker, daemon=True).start()
@@ -544,14 +841,35 @@ class MiniIcon(QWidget):
             latest = info.get("latest", "")
             if QMessageBox.question(self, "Update", f"Update available: v{latest}\nDownload now?",
                                     QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
-                url = info.get("setup_url", "")
-                name = info.get("setup_name", "rTool-Setup.exe")
-                if url:
-                    self._toast("Downloading...")
-                    download_and_run_setup(url, name)
+                self.download_update(info)
         elif success and not self.update_available:
             QMessageBox.information(self, "Update", "You are using the latest version.")
 
+    def download_update(self, info):
+        url = info.get("setup_url", "")
+        if not url or self._downloading: return
+        self._downloading = True
+        self._toast("Downloading in background...")
+        sig = self.update_signals
+        download_and_run_setup(url, info.get("setup_name", "rTool-Setup.exe"),
+                               size=info.get("setup_size", 0), sha256=info.get("setup_sha256", ""),
+                               version=info.get("latest", ""),
+                               on_progress=sig.download_progress.emit, on_done=sig.download_done.emit)
+
+    def _on_download_progress(self, done, total):
+        pct = f"{done * 100 // total}%" if total else f"{done // (1 << 20)} MiB"
+        tip = f"rTool\nDownloading update... {pct}"
+        self.setToolTip(tip)
+        if getattr(self, "tray", None):
+            self.tray.setToolTip(tip)
+
+    def _on_download_done(self, ok, msg):
+        self._downloading = False
+        self._update_hover_text()
+        self._toast(msg)
+        if not ok:
+            QMessageBox.warning(self, "Update", msg)
+
     def show_changelog(self):
         if not self.update_info:
             QMessageBox.information(self, "Changelog", "No info yet.")
@@ -585,24 +903,22 @@ class MiniIcon(QWidget):
         p.setPen(QPen(border, 1))
         p.drawRoundedRect(rect, 14, 14)
 
-        # 1. Game Icon?
-        if not self.icon_pm.isNull():
-            pm = self.icon_pm.scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            x = (self.width() - pm.width()) // 2
-            y = (self.height() - pm.height()) // 2
+        # 1. Game icon or the default 'r' logo, pre-scaled by _update_face()
+        if not self.face_pm.isNull():
+            pm = self.face_pm
+            x = (self.width() - round(pm.width() / pm.devicePixelRatio())) // 2
+            y = (self.height() - round(pm.height() / pm.devicePixelRatio())) // 2
             p.drawPixmap(x, y, pm)
-        # 2. Default Face Icon (The 'r' logo)?
-        elif not self.default_face_pm.isNull():
-            pm = self.default_face_pm.scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            x = (self.width() - pm.width()) // 2
-            y = (self.height() - pm.height()) // 2
-            p.drawPixmap(x, y, pm)
-        # 3. Fallback Text
+        # 2. Fallback Text
         else:
             p.setPen(QColor(242, 242, 242, 230))
             p.setFont(QFont("Segoe UI", 10, QFont.Bold))
             p.drawText(self.rect(), Qt.AlignCenter, "r")
         p.end()
+        if not self._started:
+            self._started = True
+            if self._profile: self._profile.mark("first paint")
+            QTimer.singleShot(0, self._finish_startup)
 
     # ================== TRAY & MENU ==================
     def _setup_tray(self):
@@ -621,6 +937,7 @@ class MiniIcon(QWidget):
         self._action_check_updates = QAction("Check Updates", self, triggered=self.on_check_updates)
         tray_menu.addAction(self._action_check_updates)
         tray_menu.addAction(QAction("Show Changelog", self, triggered=self.show_changelog))
+        tray_menu.addAction(QAction("Diagnostics", self, triggered=self.open_diagnostics))
         tray_menu.addSeparator()
         tray_menu.addAction(QAction("Exit", self, triggered=QApplication.quit))
 
@@ -677,13 +994,17 @@ class MiniIcon(QWidget):
         folders_menu.addAction(QAction("Open stplug-in Folder", self, triggered=lambda: open_path(self.stplugin)))
         folders_menu.addAction(QAction("Open depotcache Folder", self, triggered=lambda: open_path(self.depotcache)))
         folders_menu.addAction(QAction("Open rTool Folder", self, triggered=lambda: open_path(str(RTOOL_DIR))))
+        folders_menu.addAction(QAction("Open Trash Folder", self, triggered=lambda: open_path(str(TRASH_DIR))))
         m.addSeparator()
 
         # Games
         games_menu = m.addMenu(f"Games ({len(self.games)})");
         games_menu.setStyleSheet(self._menu_css)
-        games_menu.addAction(QAction("Refresh", self, triggered=self.refresh_games))
+        games_menu.addAction(QAction("Refresh", self, triggered=lambda: self.refresh_games()))
+        games_menu.addAction(QAction("Rebuild Index", self, triggered=self.rebuild_games))
         games_menu.addAction(QAction("Search...", self, triggered=self.open_search))
+        games_menu.addAction(QAction("Import App List...", self, triggered=self.pick_app_list))
+        games_menu.addAction(QAction("Undo Last Delete", self, triggered=self.restore_last_delete))
         m.addSeparator()
 
         # Run Tool - Cleaned text
@@ -719,85 +1040,201 @@ class MiniIcon(QWidget):
     def dragEnterEvent(self, e):
         if not e.mimeData().hasUrls(): return
         files = [u.toLocalFile() for u in e.mimeData().urls() if u.toLocalFile()]
-        if any(is_lua(f) or is_manifest(f) for f in files): e.acceptProposedAction()
+        if any(is_lua(f) or is_manifest(f) or is_archive(f) or os.path.isdir(f) for f in files): e.acceptProposedAction()
 
     def dropEvent(self, e):
         files = [u.toLocalFile() for u in e.mimeData().urls() if u.toLocalFile()]
         self.import_from_paths(files)
 
     # ================== ACTIONS ==================
-    def import_from_paths(self, paths):
-        if not paths: return
-        copied = 0;
-        errs = []
-        for p in paths:
+    def import_from_paths(self, paths, on_done=None):
+        """Import in the background; paths dropped while a job runs are queued."""
+        paths = [p for p in (paths or []) if p]
+        if on_done: self._import_done_cb.append(on_done)
+        if not paths:
+            if self._import_job is None: self._run_import_callbacks()
+            return
+        if self._import_job is not None:
+            self._import_queue.extend(paths)
+            return
+        sig = self.tool_signals
+        job = self.library.import_job(paths, self.state, on_progress=sig.import_progress.emit)
+        self._import_job = job
+
+        dlg = QProgressDialog("Scanning...", "Cancel", 0, 0, self)
+        dlg.setWindowTitle("rTool Import")
+        dlg.setMinimumDuration(400)
+        dlg.setAutoClose(False)
+        dlg.setAutoReset(False)
+        dlg.canceled.connect(job.cancel)
+        self._import_dlg = dlg
+
+        def worker():
             try:
-                for fp in iter_files_limited(p, NESTED_MAX_DEPTH):
-                    if is_lua(fp):
-                        shutil.copy2(fp, os.path.join(self.stplugin, os.path.basename(fp)))
-                        copied += 1
-                    elif is_manifest(fp):
-                        shutil.copy2(fp, os.path.join(self.depotcache, os.path.basename(fp)))
-                        copied += 1
+                res = job.run()
             except Exception as ex:
-                errs.append(f"{p}: {ex}")
-        self.refresh_games()
-        self._toast(f"Imported {copied} file(s)")
+                res = {"total": 0, "copied": [], "identical": [], "conflicts": [], "linked": 0,
+                       "errors": [str(ex)], "cancelled": job.cancelled}
+            sig.import_finished.emit(res)
+
+        threading.Thread(target=worker, name="rtool-import", daemon=True).start()
+
+    def cancel_import(self):
+        if self._import_job is not None:
+            self._import_job.cancel()
+        self._import_queue.clear()
+
+    def _on_import_progress(self, done, total):
+        dlg = self._import_dlg
+        if dlg is None: return
+        dlg.setMaximum(max(total, 1))
+        dlg.setValue(done)
+        dlg.setLabelText(f"Importing {done} / {total} file(s)...")
+
+    def _on_import_finished(self, res):
+        self._import_job = None
+        if self._import_dlg is not None:
+            self._import_dlg.close()
+            self._import_dlg.deleteLater()
+            self._import_dlg = None
+
+        copied = res.get("copied") or []
+        lua = {os.path.basename(p) for p in copied if is_lua(p)}
+        if lua:
+            self.refresh_games(changed=lua)
+        manifests = {os.path.basename(p) for p in copied if is_manifest(p)}
+        if manifests:
+            self.depots.update(self.depotcache, manifests)
+        identical = res.get("identical") or []
+        conflicts = res.get("conflicts") or []
+        msg = f"Imported {len(copied)} file(s)"
+        if identical:
+            msg += f", {len(identical)} identical skipped"
+        if conflicts:
+            msg += f", {len(conflicts)} conflict(s)"
+        if res.get("cancelled"):
+            msg += " (cancelled)"
+        self._toast(msg)
+        errs = list(res.get("errors") or [])
+        if conflicts:
+            verb = "left unchanged" if self.state.get("import_conflicts") == "skip" else "overwritten"
+            errs += [f"Different file {verb}: {p}" for p in conflicts]
         if errs: QMessageBox.warning(self, "Import Errors", "\n".join(errs[:10]))
 
-    def refresh_games(self):
-        games = {}
-        try:
-            if not os.path.isdir(self.stplugin): ensure_dir(self.stplugin)
-            for fn in os.listdir(self.stplugin):
-                fp = os.path.join(self.stplugin, fn)
-                if fp.lower().endswith(".lua") and os.path.isfile(fp):
-                    aid = extract_appid_from_lua(fp)
-                    if not aid: continue
-                    g = games.setdefault(aid, {"name": (self.games.get(aid, {}).get("name") if getattr(self, "games", None) else "") or f"App {aid}", "lua": []})
-                    g["lua"].append(fp)
-        except Exception:
-            pass
-        self.games = games
+        if self._import_queue:
+            queued, self._import_queue = self._import_queue, []
+            self.import_from_paths(queued)
+        else:
+            self._run_import_callbacks()
+
+    def enqueue_import(self, paths, on_done=None):
+        """Collect paths arriving in a burst (drops, forwarded invocations) into one import job."""
+        if on_done: self._import_done_cb.append(on_done)
+        if not paths:
+            self.show()
+            self.raise_()
+            return
+        self._pending_paths.extend(paths)
+        self._pending_timer.start(400)
+
+    def _flush_pending_paths(self):
+        paths, self._pending_paths = self._pending_paths, []
+        self.import_from_paths(paths)
+
+    def _run_import_callbacks(self):
+        cbs, self._import_done_cb = self._import_done_cb, []
+        for cb in cbs:
+            cb()
+
+    def refresh_games(self, full: bool = False, changed=None):
+        """Apply the stplug-in delta to the library, the search index and the name queue."""
+        touched, added = self.library.refresh(full=full, changed=changed)
+        if touched is None:
+            self._sync_game_index()
+            self._queue_unknown_names()
+        elif not touched:
+            return
+        else:
+            self._sync_game_index(touched)
+            self._queue_unknown_names(added)
+        self._notify_search()
+
+    def _on_folders_changed(self, batch):
+        names = batch.get(self.stplugin)
+        if names:
+            self.refresh_games(changed=names)
+        names = batch.get(self.depotcache)
+        if names:
+            self.depots.update(self.depotcache, names)
+
+    def rebuild_games(self):
+        self.refresh_games(full=True)
+        self._toast(f"Index rebuilt: {len(self.games)} game(s)")
+
+    def _sync_game_index(self, appids=None):
+        """Bring the search index in line with self.games (only `appids` if given)."""
+        if appids is None:
+            self.game_index.set_items((meta.get("name") or f"App {aid}", aid) for aid, meta in self.games.items())
+        else:
+            for aid in appids:
+                meta = self.games.get(aid)
+                if meta is None:
+                    self.game_index.remove(aid)
+                else:
+                    self.game_index.upsert(aid, meta.get("name") or f"App {aid}")
+        if not self.game_index.trigrams_ready and not self._index_timer.isActive():
+            self._index_timer.start()
+
+    def _build_index_step(self):
+        if self.game_index.build_trigrams():
+            self._index_timer.stop()
+
+    def _start_name_resolver(self):
+        self.resolver = NameResolver(self.tool_signals.name_resolved.emit)
+        self.resolver.start()
+        self._queue_unknown_names()
+
+    def _queue_unknown_names(self, appids=None):
+        resolver = getattr(self, "resolver", None)
+        if resolver is None: return
+        resolver.submit(self.library.unnamed(appids))
+
+    def _on_name_resolved(self, appid: str, name: str):
+        meta = self.games.get(appid)
+        if not meta: return
+        meta["name"] = name
+        self.game_index.upsert(appid, name)
+        # Coalesce a burst of resolved names into one dialog update.
+        if not self._names_timer.isActive():
+            self._names_timer.start(300)
+
+    def _notify_search(self):
         dlg = getattr(self, "search_dlg", None)
-        if dlg and hasattr(dlg, "update_items") and dlg.isVisible():
-            items = [(meta.get("name") or f"App {aid}", aid) for aid, meta in self.games.items()]
+        if dlg and dlg.isVisible():
             try:
-                dlg.update_items(items)
+                dlg.refresh_results()
             except Exception:
                 pass
 
-    def _start_name_resolver(self):
-        def worker():
-            while True:
-                unknown = []
-                for aid, meta in self.games.items():
-                    nm = meta.get("name") or ""
-                    if nm.startswith("App "): unknown.append(aid)
-                if not unknown:
-                    time.sleep(2.0);
-                    continue
-                for aid in unknown[:8]:
-                    nm = get_game_name(aid)
-                    if nm and not nm.startswith("App "):
-                        self.games[aid]["name"] = nm
-                        def update_ui():
-                            dlg = getattr(self, "search_dlg", None)
-                            if dlg and hasattr(dlg, "update_items") and dlg.isVisible():
-                                items = [(meta.get("name") or f"App {aid}", aid) for aid, meta in self.games.items()]
-                                try:
-                                    dlg.update_items(items)
-                                except Exception:
-                                    pass
-
-                        QTimer.singleShot(0, update_ui)
-                    time.sleep(0.25)
-
-        threading.Thread(target=worker, daemon=True).start()
+    def shutdown(self):
+        resolver = getattr(self, "resolver", None)
+        if resolver is not None:
+            resolver.stop()
+        _NAME_CACHE.close()
+        ARTWORK.flush()
+        METRICS.log("session\t" + json.dumps(METRICS.snapshot(), separators=(",", ":")))
+
+    def open_diagnostics(self):
+        dlg = getattr(self, "diag_dlg", None)
+        if dlg is None:
+            dlg = self.diag_dlg = DiagnosticsDialog(self)
+        dlg.show()
+        dlg.raise_()
 
     def open_search(self):
-        items = [(meta["name"], aid) for aid, meta in self.games.items()]
-        self.search_dlg = GameSearchDialog(self, items)
+        if self.thumbs is None and self.state.get("artwork", True):
+            self.thumbs = Thumbnails(online=self.state.get("artwork_online", True), parent=self)
+        self.search_dlg = GameSearchDialog(self, self.game_index, self.thumbs)
         self.search_dlg.exec_()
 
     def open_game_actions(self, appid: str):
@@ -809,35 +1246,134 @@ class MiniIcon(QWidget):
         mm.addAction(QAction(f"{name} ({appid})", self, enabled=False))
         mm.addSeparator()
         mm.addAction(QAction("Show LUA files", self, triggered=lambda: self._show_lua_files(appid)))
+        mm.addAction(QAction("Show manifests", self, triggered=lambda: self._show_manifests(appid)))
         mm.addAction(QAction("Delete (LUA only)", self, triggered=lambda: self._remove_game(appid, False)))
         mm.addAction(QAction("Delete (LUA + manifests)", self, triggered=lambda: self._remove_game(appid, True)))
+        mm.addSeparator()
+        mm.addAction(QAction("Set artwork...", self, triggered=lambda: self.set_artwork(appid)))
         mm.exec_(QCursor.pos())
 
+    def set_artwork(self, appid: str):
+        fn, _ = QFileDialog.getOpenFileName(self, "Select Artwork", "",
+                                            "Images (*.jpg *.jpeg *.png *.gif *.bmp *.webp);;All files (*)")
+        if not fn: return
+        try:
+            ARTWORK.import_image(appid, fn)
+        except Exception as ex:
+            self._toast(f"Artwork not set: {ex}")
+            return
+        if self.thumbs is not None:
+            self.thumbs.forget(appid)
+        dlg = getattr(self, "search_dlg", None)
+        if dlg is not None and dlg.isVisible():
+            dlg.list.viewport().update()
+        self._toast("Artwork updated")
+
+    def pick_app_list(self):
+        fn, _ = QFileDialog.getOpenFileName(self, "Select Steam App List", "", "JSON (*.json);;All files (*)")
+        if not fn: return
+        self._toast("Importing app list...")
+
+        def worker():
+            try:
+                n = import_app_list(fn)
+                self.tool_signals.app_list_imported.emit(True, f"App list imported: {n} name(s)")
+            except Exception as ex:
+                self.tool_signals.app_list_imported.emit(False, f"App list import failed: {ex}")
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_app_list_imported(self, success, msg):
+        self._toast(msg)
+        if not success: return
+        for aid, meta in self.games.items():
+            if (meta.get("name") or "").startswith("App "):
+                meta["name"] = cached_game_name(aid) or meta.get("name")
+                self.game_index.upsert(aid, meta["name"])
+        self._notify_search()
+
     def _show_lua_files(self, appid: str):
         meta = self.games.get(appid)
         if not meta: return
         QMessageBox.information(self, "LUA Files", "\n".join(meta.get("lua", [])) or "(none)")
 
+    def _show_manifests(self, appid: str):
+        files = self.library.game_manifests(appid)
+        QMessageBox.information(self, "Manifests", "\n".join(files) or "(none)")
+
     def _remove_game(self, appid: str, remove_manifests: bool):
-        meta = self.games.get(appid)
-        if not meta: return
-        files = list(meta.get("lua") or [])
-        if remove_manifests:
-            try:
-                for fn in os.listdir(self.depotcache):
-                    if fn.lower().endswith((".manifest", ".mfst")) and appid in fn:
-                        files.append(os.path.join(self.depotcache, fn))
-            except Exception:
-                pass
-        if not files: return
-        if QMessageBox.question(self, "Confirm Delete", f"Delete {len(files)} file(s)?",
+        self.bulk_remove([appid], remove_manifests)
+
+    def bulk_remove(self, appids, remove_manifests: bool):
+        """Move the files of all `appids` to the trash in one background pass."""
+        if self._bulk_busy:
+            self._toast("Busy: another delete, export or restore is running")
+            return
+        appids = [a for a in appids if a in self.games]
+        files = self.library.plan_files(appids, remove_manifests)
+        shared = self.library.shared_luas(appids)
+        kept = ""
+        if shared:
+            users = sorted({aid for others in shared.values() for aid in others})
+            names = ", ".join((self.games.get(aid) or {}).get("name") or f"App {aid}" for aid in users[:5])
+            more = f" and {len(users) - 5} more" if len(users) > 5 else ""
+            kept = f"\n\nKept {len(shared)} lua file(s) that {names}{more} also use(s)."
+        if not files:
+            if kept: QMessageBox.information(self, "Nothing to delete", kept.strip())
+            return
+        what = self.games[appids[0]].get("name") if len(appids) == 1 else f"{len(appids)} games"
+        if QMessageBox.question(self, "Confirm Delete",
+                                f"Delete {len(files)} file(s) of {what}?\n\nFiles are moved to the rTool trash.{kept}",
                                 QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes: return
-        for fp in files:
+        self._run_bulk("delete", lambda: move_to_trash(files, apps=appids))
+
+    def bulk_export(self, appids):
+        if self._bulk_busy:
+            self._toast("Busy: another delete, export or restore is running")
+            return
+        files = self.library.plan_files(appids, True, keep_shared=False)
+        if not files: return
+        out, _ = QFileDialog.getSaveFileName(self, "Export Games", "rtool-export.zip", "Zip (*.zip)")
+        if not out: return
+        self._run_bulk("export", lambda: export_files(files, out))
+
+    def restore_last_delete(self):
+        if self._bulk_busy:
+            self._toast("Busy: another delete, export or restore is running")
+            return
+        batches = trash_batches()
+        if not batches:
+            self._toast("Trash is empty")
+            return
+        self._run_bulk("restore", lambda: restore_trash_batch(batches[0]))
+
+    def _run_bulk(self, kind: str, fn):
+        self._bulk_busy = True
+        self._toast("Working...")
+        sig = self.tool_signals
+
+        def worker():
             try:
-                if os.path.exists(fp): os.remove(fp)
-            except Exception:
-                pass
-        self.refresh_games()
+                if kind == "delete":
+                    prune_trash()
+                done, errors = fn()
+            except Exception as ex:
+                done, errors = [], [str(ex)]
+            sig.bulk_finished.emit({"kind": kind, "done": done, "errors": errors})
+
+        threading.Thread(target=worker, name="rtool-bulk", daemon=True).start()
+
+    def _on_bulk_finished(self, res):
+        self._bulk_busy = False
+        kind, done, errors = res["kind"], res["done"], res["errors"]
+        if kind == "export":
+            self._toast(f"Exported {done} file(s)")
+        else:
+            # One catalog/depot delta for the whole batch.
+            self.refresh_games(changed={os.path.basename(fp) for fp in done if is_lua(fp)})
+            self.depots.update(self.depotcache, {os.path.basename(fp) for fp in done if is_manifest(fp)})
+            self._toast(f"{'Deleted' if kind == 'delete' else 'Restored'} {len(done)} file(s)")
+        if errors: QMessageBox.warning(self, "Errors", "\n".join(errors[:10]))
 
     def run_tool(self):
         self._toast("Starting tool...")
@@ -855,20 +1391,18 @@ class MiniIcon(QWidget):
         threading.Thread(target=worker, daemon=True).start()
 
     def launch_steam(self):
-        exe = os.path.join(self.steam_path, "Steam.exe")
-        if os.path.exists(exe):
-            subprocess.Popen([exe], shell=False)
-        else:
-            QMessageBox.warning(self, "Error", f"Steam not found:\n{exe}")
+        if not self.steam.launch():
+            self._toast("Steam is already being started")
 
     def restart_steam(self):
-        exe = os.path.join(self.steam_path, "Steam.exe")
-        if not os.path.exists(exe):
-            QMessageBox.warning(self, "Error", f"Steam not found:\n{exe}")
-            return
-        subprocess.call(["taskkill", "/F", "/IM", "steam.exe"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        time.sleep(1.5)
-        subprocess.Popen([exe], shell=False)
+        if not self.steam.restart():
+            self._toast("Steam is already being restarted")
+
+    def _on_steam_state(self, state, detail):
+        if state == "failed":
+            QMessageBox.warning(self, "Steam", detail)
+        else:
+            self._toast(detail)
 
     def pick_steam(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Steam Folder", self.steam_path)
@@ -876,11 +1410,10 @@ class MiniIcon(QWidget):
         self.steam_path = folder
         self.state["steam_path"] = folder
         save_json(STATE_FILE, self.state)
-        self.stplugin = os.path.join(self.steam_path, "config", "stplug-in")
-        self.depotcache = os.path.join(self.steam_path, "depotcache")
-        ensure_dir(self.stplugin);
-        ensure_dir(self.depotcache)
+        self.library.set_steam_path(folder)
+        self.steam.set_steam_path(folder)
         self.refresh_games()
+        self.watcher.set_folders([self.stplugin, self.depotcache])
         self._toast("Steam path saved")
 
     def add_right_click(self):
@@ -901,18 +1434,23 @@ class MiniIcon(QWidget):
 # =========================
 #   MAIN
 # =========================
-def main():
+def main(instance=None, profile=None):
     app = QApplication(sys.argv)
-    w = MiniIcon()
+    if profile: profile.mark("QApplication")
+    w = MiniIcon(profile)
+    if profile: profile.mark("MiniIcon.__init__")
+    app.aboutToQuit.connect(w.shutdown)
     w.show()
+    if instance is not None:
+        instance.serve(w.tool_signals.paths_forwarded.emit)
+        app.aboutToQuit.connect(instance.close)
 
     args = [a for a in sys.argv[1:]]
     if args:
-        w.import_from_paths(args)
-        QTimer.singleShot(2500, QApplication.quit)
+        w.enqueue_import(args, on_done=QApplication.quit)
 
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(_INSTANCE, _PROFILE)
\ No newline at end of file
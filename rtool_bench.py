@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for the filesystem and search hot paths (no Qt needed).
+
+    python rtool_bench.py --scale small --out results.json
+    python rtool_bench.py --luas 50000 --manifests 200000 --only extract,refresh
+    python rtool_bench.py --compare old.json --out new.json
+
+Each run builds a synthetic Steam tree (seeded, so reproducible) in a temp
+folder, times every benchmark `--repeat` times (best and median are kept),
+then runs it once more under tracemalloc for the peak memory. --compare
+prints the change against an earlier result file and exits 1 when a
+benchmark got more than --threshold slower.
+"""
+import argparse, json, os, platform, random, shutil, statistics, sys, tempfile, time, tracemalloc, zipfile
+from pathlib import Path
+
+SCALES = {
+    "small": (1000, 4000),
+    "medium": (10000, 40000),
+    "large": (50000, 200000),
+}
+
+_WORDS = ("Dark Souls Counter Strike Portal Half Life Stardew Valley Hades Elden Ring Witcher Cyberpunk "
+          "Factorio Terraria Celeste Hollow Knight Doom Eternal Skyrim Fallout Subnautica Rimworld").split()
+
+
+# =========================
+#   SYNTHETIC TREE
+# =========================
+def _lua_text(rng, appid, depots, shape):
+    lines = [f"addappid({appid})"]
+    for d in depots:
+        lines.append(f'addappid({d}, 1, "{rng.getrandbits(128):032x}")')
+        lines.append(f'setManifestid({d}, "{rng.getrandbits(60)}", 0)')
+    if shape == "commented":
+        lines = [f"-- generated for {appid}", "-- " + " ".join(rng.choices(_WORDS, k=12))] + lines
+    elif shape == "large":
+        # Past LUA_MMAP_MIN so the mmap path is exercised.
+        lines += ["-- " + "x" * 120] * 2400
+    elif shape == "crlf":
+        return "\r\n".join(lines) + "\r\n"
+    return "\n".join(lines) + "\n"
+
+
+def build_tree(root: Path, luas: int, manifests: int, seed: int = 1):
+    """Steam folder with `luas` lua files and `manifests` depotcache files.
+
+    Lua shapes: plain, commented, CRLF and a few large (mmap-sized) files;
+    manifests are spread over each app's depots, the rest are orphans.
+    Returns {"steam", "appids", "bytes"}.
+    """
+    rng = random.Random(seed)
+    steam = root / "steam"
+    sp = steam / "config" / "stplug-in"
+    dc = steam / "depotcache"
+    sp.mkdir(parents=True, exist_ok=True)
+    dc.mkdir(parents=True, exist_ok=True)
+    appids = rng.sample(range(10, 4000000), luas)
+    per_app = max(1, manifests // max(luas, 1))
+    total = 0
+    made = 0
+    for n, aid in enumerate(appids):
+        depots = [aid + k for k in range(1, 1 + rng.randint(1, 3))]
+        shape = "large" if n % 997 == 0 else ("commented", "plain", "plain", "crlf")[n % 4]
+        text = _lua_text(rng, aid, depots, shape)
+        (sp / f"{aid}.lua").write_text(text, "utf-8", newline="")
+        total += len(text)
+        for k in range(per_app if made < manifests else 0):
+            depot = depots[k % len(depots)]
+            (dc / f"{depot}_{rng.getrandbits(60)}.manifest").write_bytes(b"\0" * rng.choice((64, 512, 4096)))
+            made += 1
+    while made < manifests:  # orphans: depots no lua refers to
+        (dc / f"{rng.randrange(5000000, 9000000)}_{made}.manifest").write_bytes(b"\0" * 64)
+        made += 1
+    return {"steam": str(steam), "appids": [str(a) for a in appids], "bytes": total}
+
+
+def build_import_source(root: Path, count: int, seed: int = 2):
+    """A folder of new lua/manifest files (some nested) plus a zip of more.
+
+    Returns (paths to import, names of every file they contain).
+    """
+    rng = random.Random(seed)
+    src = root / "import"
+    names = set()
+    for n in range(count):
+        aid = 10000000 + 2 * n
+        sub = src / ("nested/deeper" if n % 5 == 0 else "flat")
+        sub.mkdir(parents=True, exist_ok=True)
+        (sub / f"{aid}.lua").write_text(_lua_text(rng, aid, [aid + 1], "plain"), "utf-8")
+        (sub / f"{aid + 1}_{n}.manifest").write_bytes(b"\0" * 512)
+        names.update((f"{aid}.lua", f"{aid + 1}_{n}.manifest"))
+    archive = root / "import.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for n in range(max(1, count // 4)):
+            aid = 20000000 + 2 * n
+            zf.writestr(f"pack/{aid}.lua", _lua_text(rng, aid, [aid + 1], "plain"))
+            zf.writestr(f"pack/{aid + 1}_{n}.manifest", b"\0" * 512)
+            names.update((f"{aid}.lua", f"{aid + 1}_{n}.manifest"))
+    return [str(src), str(archive)], names
+
+
+# =========================
+#   BENCHMARKS
+# =========================
+class Bench:
+    """One benchmark: setup() before every run (untimed), run() -> items processed."""
+    name = ""
+    unit = "items"
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+
+    def setup(self):
+        pass
+
+    def run(self) -> int:
+        raise NotImplementedError
+
+
+class WalkBench(Bench):
+    name, unit = "walk_files", "files"
+    workers = 0
+
+    def run(self):
+        return sum(1 for _ in core.walk_files(self.ctx["steam"], 6, core.IMPORT_SUFFIXES, self.workers))
+
+
+class WalkParallelBench(WalkBench):
+    name = "walk_files_parallel"
+    workers = 4
+
+
+class ExtractBench(Bench):
+    name, unit = "extract_appid_from_lua", "files"
+
+    def setup(self):
+        self.files = [e.path for e in os.scandir(self.ctx["stplugin"])]
+
+    def run(self):
+        for fp in self.files:
+            core.scan_lua_appids(fp)
+        return len(self.files)
+
+
+class RefreshColdBench(Bench):
+    """refresh_games on a first start: no catalog, everything parsed."""
+    name, unit = "refresh_games.cold", "files"
+
+    def setup(self):
+        for f in ("catalog.json", "depots.json"):
+            try:
+                os.remove(os.path.join(self.ctx["work"], f))
+            except OSError:
+                pass
+
+    def run(self):
+        lib = self.ctx["library"]()
+        lib.refresh()
+        return sum(len(m["lua"]) for m in lib.games.values())
+
+
+class RefreshWarmBench(Bench):
+    """refresh_games on a later start: catalog on disk, nothing changed."""
+    name, unit = "refresh_games.warm", "files"
+
+    def setup(self):
+        self.ctx["library"]().refresh()
+
+    def run(self):
+        lib = self.ctx["library"]()
+        lib.refresh()
+        return sum(len(m["lua"]) for m in lib.games.values())
+
+
+class RefreshDeltaBench(Bench):
+    """The watcher path: 100 touched files folded into a loaded library."""
+    name, unit = "refresh_games.delta", "files"
+
+    def setup(self):
+        self.lib = self.ctx["library"]()
+        self.lib.refresh()
+        self.names = [f"{aid}.lua" for aid in self.ctx["appids"][:100]]
+        for n in self.names:
+            p = os.path.join(self.ctx["stplugin"], n)
+            os.utime(p, ns=(time.time_ns(), time.time_ns()))
+
+    def run(self):
+        self.lib.refresh(changed=self.names)
+        return len(self.names)
+
+
+class ImportBench(Bench):
+    """import_from_paths: folders + a zip into the tree, then the same again (all identical)."""
+    name, unit = "import_from_paths", "files"
+
+    def setup(self):
+        self.lib = self.ctx["library"]()
+        self.lib.refresh()
+        names = self.ctx["import_names"]
+        for d in (self.lib.stplugin, self.lib.depotcache):
+            for e in os.scandir(d):
+                if e.name in names:
+                    os.remove(e.path)
+        self.lib.refresh()
+
+    def run(self):
+        res = self.lib.import_job(self.ctx["import_src"], link_mode="copy").run()
+        self.lib.apply_files(res["copied"])
+        again = self.lib.import_job(self.ctx["import_src"], link_mode="copy").run()
+        return res["total"] + again["total"]
+
+
+class RemoveBench(Bench):
+    """_remove_game for 200 games with manifests: plan, move to trash, one delta."""
+    name, unit = "remove_games", "games"
+
+    def setup(self):
+        self.lib = self.ctx["library"]()
+        self.lib.refresh()
+        self.appids = [a for a in self.ctx["appids"][-200:] if a in self.lib.games]
+        self.files = self.lib.plan_files(self.appids, True)
+        self.trash = Path(self.ctx["work"]) / "trash"
+
+    def run(self):
+        moved, _ = core.move_to_trash(self.files, self.trash, apps=self.appids)
+        self.lib.apply_files(moved)
+        # Put everything back so the tree is unchanged for the next run.
+        for batch in core.trash_batches(self.trash):
+            core.restore_trash_batch(batch)
+        self.lib.apply_files(moved)
+        return len(self.appids)
+
+
+class SearchBench(Bench):
+    """GameSearchDialog._filter: type a name one key at a time, then clear it."""
+    name, unit = "search_filter", "keystrokes"
+
+    def setup(self):
+        rng = random.Random(3)
+        self.items = [(" ".join(rng.choices(_WORDS, k=rng.randint(1, 4))), aid) for aid in self.ctx["appids"]]
+        self.index = core.GameIndex()
+        self.index.set_items(self.items)
+        while not self.index.build_trigrams(1.0):
+            pass
+        self.queries = ["hollow knight", "counter str", "eldn rng", self.ctx["appids"][0][:3]]
+
+    def run(self):
+        idx, n = self.index, 0
+        for q in self.queries:
+            rows = idx.search("")
+            for i in range(1, len(q) + 1):
+                new = idx.search(q[:i], rows if not q.isdigit() else None)
+                core.diff_ranges(rows, new, 48)
+                rows = new
+                n += 1
+        return n
+
+
+BENCHES = [WalkBench, WalkParallelBench, ExtractBench, RefreshColdBench, RefreshWarmBench, RefreshDeltaBench,
+           ImportBench, RemoveBench, SearchBench]
+
+
+def measure(bench: Bench, repeat: int) -> dict:
+    times, items = [], 0
+    for _ in range(repeat):
+        bench.setup()
+        t = time.perf_counter()
+        items = bench.run()
+        times.append(time.perf_counter() - t)
+    bench.setup()
+    tracemalloc.start()
+    bench.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = min(times)
+    return {"unit": bench.unit, "items": items, "best_s": round(best, 5),
+            "median_s": round(statistics.median(times), 5),
+            "per_s": round(items / best, 1) if best > 0 else None,
+            "peak_kib": round(peak / 1024, 1)}
+
+
+def compare(old: dict, new: dict, threshold: float) -> int:
+    """Print best-time ratios against `old`; returns the number of regressions."""
+    bad = 0
+    for name, r in new["results"].items():
+        o = old.get("results", {}).get(name)
+        if not o or not o.get("best_s"):
+            print(f"{name:<26} (new)")
+            continue
+        ratio = r["best_s"] / o["best_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag, bad = "  REGRESSION", bad + 1
+        print(f"{name:<26} {o['best_s']:9.4f}s -> {r['best_s']:9.4f}s  x{ratio:5.2f}  "
+              f"mem {o.get('peak_kib', 0):9.0f} -> {r['peak_kib']:9.0f} KiB{flag}")
+    return bad
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="rTool hot-path benchmarks")
+    p.add_argument("--scale", choices=sorted(SCALES), default="small")
+    p.add_argument("--luas", type=int, help="lua files (overrides --scale)")
+    p.add_argument("--manifests", type=int, help="depotcache manifests (overrides --scale)")
+    p.add_argument("--imports", type=int, default=500, help="lua+manifest pairs in the import source")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--only", help="comma separated benchmark names (prefix match)")
+    p.add_argument("--out", help="write results to this JSON file")
+    p.add_argument("--compare", help="earlier results JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging (0.15 = 15%%)")
+    p.add_argument("--keep", action="store_true", help="keep the generated tree")
+    args = p.parse_args(argv)
+
+    luas, manifests = SCALES[args.scale]
+    luas = args.luas if args.luas is not None else luas
+    manifests = args.manifests if args.manifests is not None else manifests
+
+    work = Path(tempfile.mkdtemp(prefix="rtool-bench-"))
+    # Isolate every cache and state file from a real install.
+    os.environ["RTOOL_HOME"] = str(work / "home")
+    global core
+    import rtool_core as core
+
+    try:
+        t = time.perf_counter()
+        tree = build_tree(work, luas, manifests, args.seed)
+        import_src, import_names = build_import_source(work, args.imports, args.seed + 1)
+        print(f"tree: {luas} lua, {manifests} manifests, {args.imports * 2} import files "
+              f"in {time.perf_counter() - t:.1f}s ({work})", file=sys.stderr)
+        ctx = {
+            "work": str(work), "steam": tree["steam"], "appids": tree["appids"], "import_src": import_src,
+            "import_names": import_names,
+            "stplugin": os.path.join(tree["steam"], "config", "stplug-in"),
+            "library": lambda: core.Library(tree["steam"], work / "catalog.json", work / "depots.json"),
+        }
+        only = [s.strip() for s in (args.only or "").split(",") if s.strip()]
+        results = {}
+        for cls in BENCHES:
+            if only and not any(cls.name.startswith(o) for o in only):
+                continue
+            r = results[cls.name] = measure(cls(ctx), max(1, args.repeat))
+            print(f"{cls.name:<26} best {r['best_s']:9.4f}s  median {r['median_s']:9.4f}s  "
+                  f"{r['per_s'] or 0:>12,.0f} {r['unit']}/s  peak {r['peak_kib']:>9,.0f} KiB", file=sys.stderr)
+    finally:
+        core._NAME_CACHE.close()
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    out = {
+        "version": core.APP_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"luas": luas, "manifests": manifests, "imports": args.imports,
+                   "repeat": args.repeat, "seed": args.seed},
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(out, indent=2), "utf-8")
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text("utf-8"))
+        if old.get("params") != out["params"]:
+            print("warning: comparing runs with different parameters", file=sys.stderr)
+        return 1 if compare(old, out, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Headless rTool commands. No Qt, no registry; exits as soon as the work is done.
+
+    rTool import PATH... [--on-conflict skip] [--link copy]
+    rTool list [--json] [--filter TEXT]
+    rTool remove APPID... [--manifests]
+    rTool resolve-names [APPID...] [--timeout 60]
+    rTool scan [--full] [--json]
+
+Also runnable as `python rtool_cli.py ...`. Exit code 0 = ok, 1 = some
+items failed, 2 = bad usage.
+"""
+import argparse, json, sys, time
+
+COMMANDS = ("import", "list", "remove", "resolve-names", "scan")
+
+
+def _library(args):
+    from rtool_core import HTTP, STATE_FILE, STEAM_DEFAULT, Library, load_json
+    state = load_json(STATE_FILE, {})
+    HTTP.configure(timeout=state.get("http_timeout"), proxy=state.get("http_proxy"))
+    return Library(args.steam or state.get("steam_path") or STEAM_DEFAULT), state
+
+
+def _out(args, data, lines):
+    if args.json:
+        json.dump(data, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        for line in lines:
+            print(line)
+
+
+def _errors(errors):
+    for e in errors:
+        print(f"error: {e}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def cmd_import(args):
+    lib, state = _library(args)
+    lib.refresh()
+    kw = {"workers": args.workers}
+    if args.on_conflict: kw["on_conflict"] = args.on_conflict
+    if args.link: kw["link_mode"] = args.link
+    res = lib.import_job(args.paths, state, **kw).run()
+    lib.apply_files(res["copied"])
+    res["copied"] = sorted(res["copied"])
+    res["identical"] = sorted(res["identical"])
+    res["conflicts"] = sorted(res["conflicts"])
+    _out(args, res, [f"Imported {len(res['copied'])} file(s), {len(res['identical'])} identical skipped, "
+                     f"{len(res['conflicts'])} conflict(s)"])
+    return _errors(res["errors"])
+
+
+def cmd_list(args):
+    lib, _ = _library(args)
+    lib.refresh()
+    items = sorted(lib.games.items(), key=lambda kv: (kv[1]["name"].casefold(), kv[0]))
+    if args.filter:
+        from rtool_core import GameIndex
+        idx = GameIndex()
+        idx.set_items((meta["name"], aid) for aid, meta in items)
+        while not idx.build_trigrams(1.0):
+            pass
+        items = [(aid, lib.games[aid]) for aid in map(idx.ids.__getitem__, idx.search(args.filter))]
+    data = [{"appid": aid, "name": meta["name"], "lua": meta["lua"],
+             "manifests": lib.game_manifests(aid)} for aid, meta in items]
+    _out(args, data, [f"{d['appid']}\t{d['name']}" for d in data])
+    return 0
+
+
+def cmd_remove(args):
+    from rtool_core import move_to_trash, prune_trash
+    lib, _ = _library(args)
+    lib.refresh()
+    missing = [aid for aid in args.appids if aid not in lib.games]
+    appids = [aid for aid in args.appids if aid in lib.games]
+    files = lib.plan_files(appids, args.manifests)
+    shared = lib.shared_luas(appids)
+    moved, errors = move_to_trash(files, apps=appids) if files else ([], [])
+    prune_trash()
+    lib.apply_files(moved)
+    _out(args, {"removed": moved, "kept": shared, "missing": missing, "errors": errors},
+         [f"Moved {len(moved)} file(s) of {len(appids)} game(s) to the trash"]
+         + [f"kept {fp}: also used by {', '.join(others)}" for fp, others in sorted(shared.items())]
+         + [f"not installed: {aid}" for aid in missing])
+    return _errors(errors) or (1 if missing else 0)
+
+
+def cmd_resolve_names(args):
+    from rtool_core import NameResolver, _NAME_CACHE
+    lib, _ = _library(args)
+    lib.refresh()
+    ids = args.appids or lib.unnamed()
+    found = {}
+    resolver = NameResolver(lambda aid, name: found.__setitem__(aid, name), workers=args.workers)
+    resolver.start()
+    resolver.submit(ids)
+    deadline = time.monotonic() + args.timeout
+    try:
+        while resolver.queue_depth() and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        resolver.stop()
+        _NAME_CACHE.close()
+    stats = resolver.stats()
+    _out(args, {"resolved": found, "stats": stats},
+         [f"{aid}\t{name}" for aid, name in sorted(found.items())]
+         + [f"Resolved {len(found)} of {len(ids)} name(s), {stats['not_found']} not found"])
+    return 1 if stats["queued"] + stats["inflight"] else 0
+
+
+def cmd_scan(args):
+    lib, _ = _library(args)
+    t = time.perf_counter()
+    lib.refresh(full=args.full)
+    data = {"stplugin": lib.stplugin, "depotcache": lib.depotcache, "games": len(lib.games),
+            "lua_files": sum(len(m["lua"]) for m in lib.games.values()),
+            "unnamed": len(lib.unnamed()), "seconds": round(time.perf_counter() - t, 3)}
+    _out(args, data, [f"{k}: {v}" for k, v in data.items()])
+    return 0
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="rTool", description="Headless rTool commands.")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("import", help="import .lua/.manifest files, folders or zips")
+    s.add_argument("paths", nargs="+")
+    s.add_argument("--on-conflict", choices=("overwrite", "skip"))
+    s.add_argument("--link", choices=("auto", "reflink", "hardlink", "copy"))
+    s.add_argument("--workers", type=int, default=4)
+    s.set_defaults(func=cmd_import)
+
+    s = sub.add_parser("list", help="list installed games")
+    s.add_argument("--filter", help="same matching as the search dialog")
+    s.set_defaults(func=cmd_list)
+
+    s = sub.add_parser("remove", help="move a game's files to the rTool trash")
+    s.add_argument("appids", nargs="+")
+    s.add_argument("--manifests", action="store_true", help="also remove depotcache manifests")
+    s.set_defaults(func=cmd_remove)
+
+    s = sub.add_parser("resolve-names", help="look up unknown game names in the store")
+    s.add_argument("appids", nargs="*")
+    s.add_argument("--timeout", type=float, default=60)
+    s.add_argument("--workers", type=int, default=4)
+    s.set_defaults(func=cmd_resolve_names)
+
+    s = sub.add_parser("scan", help="update the catalog and depot index")
+    s.add_argument("--full", action="store_true", help="re-parse every file")
+    s.set_defaults(func=cmd_scan)
+
+    for s in sub.choices.values():
+        s.add_argument("--json", action="store_true", help="machine-readable output")
+        s.add_argument("--steam", help="Steam folder (default: the one saved by the tray app)")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
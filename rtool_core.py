@@ -0,0 +1,3166 @@
+# -*- coding: utf-8 -*-
+"""rTool core: catalog, name lookup and import logic shared by the tray app and the CLI.
+
+Nothing in here may import PyQt5 or winreg. Modules that only some code
+paths need (http.client, ssl, zipfile, sqlite3, concurrent.futures) are imported where
+they are used, so the tray widget and the CLI start without them.
+"""
+from __future__ import annotations
+
+import os, sys, json, shutil, subprocess, time, re, threading, mmap, struct, heapq, random, bisect
+import unicodedata, hashlib
+import itertools, operator
+from abc import ABC, abstractmethod
+from collections import namedtuple, Counter, deque
+from pathlib import Path, PurePosixPath
+
+TYPE_CHECKING = False  # what typing.TYPE_CHECKING is at runtime, without importing typing
+if TYPE_CHECKING:
+    import zipfile  # annotations only; imported where zips are read
+
+# =========================
+#   AUTO UPDATE (GitHub)
+# =========================
+OWNER = "fallizzy"
+REPO = "rTool"
+APP_VERSION = "1.0.2"
+UPDATE_CHECK_INTERVAL = 6 * 3600  # seconds between automatic update checks
+
+def ver_tuple(v: str):
+    """Turn version like 1.2.3 or v1.2 into (1,2,3). Missing parts -> 0."""
+    nums = re.findall(r"\d+", v or "")
+    nums = (nums + ["0", "0", "0"])[:3]
+    return tuple(int(x) for x in nums)
+
+
+
+def _http_json(url: str, headers=None):
+    """GET `url` -> (status, parsed JSON or None, response headers). A 304 is returned, not raised."""
+    return HTTP.get_json(url, {
+        "Accept": "application/vnd.github+json",
+        "User-Agent": f"{REPO}-updater",
+        **(headers or {})
+    }, timeout=12)
+
+
+def get_latest_release_info(force: bool = False, min_interval: float = UPDATE_CHECK_INTERVAL):
+    """Latest release, cached in RELEASE_CACHE_FILE.
+
+    Within `min_interval` seconds of the last check (unless `force`) the
+    cached info is returned without a request. Otherwise the request is
+    conditional (If-None-Match / If-Modified-Since) and a 304 reuses the
+    cache. When GitHub cannot be reached or rate-limits us, the cached info
+    is returned with "stale": True; without a cache the error propagates.
+    A rate-limit block is kept even when there is no cached info, so
+    automatic checks stay off GitHub until its reset time.
+    """
+    cache = load_json(RELEASE_CACHE_FILE, {})
+    if not isinstance(cache, dict):
+        cache = {}
+    info = cache.get("info")
+    if not isinstance(info, dict):
+        info = None
+        cache = {"blocked_until": cache["blocked_until"]} if "blocked_until" in cache else {}
+    now = time.time()
+    blocked = now < cache.get("blocked_until", 0)
+    if info and not force and (now - cache.get("checked_at", 0) < min_interval or blocked):
+        METRICS.count("update_check.cached")
+        return dict(info, cached=True)
+    if blocked and not force:
+        METRICS.count("update_check.blocked")
+        raise RuntimeError("GitHub rate limit: retry after " + time.strftime("%H:%M", time.localtime(cache["blocked_until"])))
+
+    headers = {}
+    if info and cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+    if info and cache.get("last_modified"):
+        headers["If-Modified-Since"] = cache["last_modified"]
+    api = f"https://api.github.com/repos/{OWNER}/{REPO}/releases/latest"
+    try:
+        with METRICS.span("update_check"):
+            status, data, resp_headers = _http_json(api, headers)
+    except Exception as ex:
+        if getattr(ex, "code", None) in (403, 429):
+            # Rate limited: no automatic checks until GitHub's reset time.
+            try:
+                reset = float(ex.headers.get("X-RateLimit-Reset") or 0)
+            except (TypeError, ValueError, AttributeError):
+                reset = 0
+            cache["blocked_until"] = max(reset, now + 600)
+            save_json(RELEASE_CACHE_FILE, cache)
+        if info:
+            return dict(info, cached=True, stale=True)
+        raise
+
+    cache["checked_at"] = now
+    cache.pop("blocked_until", None)
+    if status == 304 and info:
+        METRICS.count("update_check.not_modified")
+        save_json(RELEASE_CACHE_FILE, cache)
+        return dict(info, cached=True)
+    info = _release_info(data or {})
+    cache.update(info=info, etag=resp_headers.get("ETag") or "", last_modified=resp_headers.get("Last-Modified") or "")
+    save_json(RELEASE_CACHE_FILE, cache)
+    return dict(info)
+
+
+def _release_info(data: dict) -> dict:
+    tag = (data.get("tag_name") or "").strip()
+    latest = tag.lstrip("v").strip()
+    body = (data.get("body") or "").strip()
+
+    assets = data.get("assets") or []
+    setup = None
+    for a in assets:
+        name = (a.get("name") or "").lower()
+        if name.endswith(".exe") and ("setup" in name or "installer" in name or "rtool" in name):
+            setup = a
+            break
+    if not setup:
+        for a in assets:
+            name = (a.get("name") or "").lower()
+            if name.endswith(".exe"):
+                setup = a
+                break
+
+    url = setup.get("browser_download_url") if setup else ""
+    setup_name = setup.get("name") if setup else ""
+    # Newer API responses carry "digest": "sha256:<hex>" per asset.
+    digest = (setup.get("digest") or "") if setup else ""
+
+    return {
+        "latest": latest,
+        "tag": tag,
+        "body": body,
+        "setup_url": url,
+        "setup_name": setup_name,
+        "setup_size": int(setup.get("size") or 0) if setup else 0,
+        "setup_sha256": digest[7:].lower() if digest.startswith("sha256:") else ""
+    }
+
+
+DOWNLOAD_CHUNK = 256 * 1024
+
+
+def _file_sha256(path: str, h=None):
+    h = h or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h
+
+
+def _verify(path: str, size: int, sha256: str) -> str:
+    """"" when `path` matches the expected size/digest (either may be unknown), else the reason."""
+    st = os.stat(path)
+    if size and st.st_size != size:
+        return f"size {st.st_size} != {size}"
+    if sha256 and _file_sha256(path).hexdigest() != sha256:
+        return "SHA-256 mismatch"
+    return ""
+
+
+def download_file(url: str, dest: str, size: int = 0, sha256: str = "", on_progress=None,
+                  cancel: threading.Event = None, retries: int = 4) -> str:
+    """Download `url` to `dest` through `dest`.part, resuming with HTTP Range.
+
+    An existing `dest` that verifies is reused. The .part file survives
+    failures so the next attempt (or retry) continues where it stopped; it
+    is renamed onto `dest` only after the size and SHA-256 check. Redirects
+    are followed; any final status other than 200/206 is an HttpError.
+    on_progress(done, total) is called at most every 0.2 s. Raises on
+    failure.
+    """
+    if os.path.exists(dest) and not _verify(dest, size, sha256):
+        METRICS.count("download.cached")
+        return dest
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    part = dest + ".part"
+    attempt = 0
+    with METRICS.span("download"):
+        while True:
+            have = os.path.getsize(part) if os.path.exists(part) else 0
+            if size and have > size:
+                os.remove(part)
+                have = 0
+            headers = {"User-Agent": f"{REPO}-updater"}
+            if have:
+                headers["Range"] = f"bytes={have}-"
+            try:
+                with HTTP.stream(url, headers, timeout=30) as resp:
+                    if resp.status not in (200, 206):
+                        raise HttpError(resp.status, resp.reason or "unexpected status", url, resp.headers)
+                    if have and resp.status != 206:
+                        have = 0  # server ignored Range: start over
+                    total = size or (have + int(resp.headers.get("Content-Length") or 0))
+                    with open(part, "ab" if have else "wb") as f:
+                        done, last = have, 0.0
+                        while True:
+                            if cancel is not None and cancel.is_set():
+                                raise InterruptedError("download cancelled")
+                            chunk = resp.read(DOWNLOAD_CHUNK)
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            done += len(chunk)
+                            now = time.monotonic()
+                            if on_progress and now - last >= 0.2:
+                                last = now
+                                on_progress(done, total)
+                if on_progress:
+                    on_progress(done, total)
+                if total and done < total:
+                    raise ConnectionError(f"connection closed at {done} of {total} bytes")
+                break
+            except InterruptedError:
+                raise
+            except Exception as ex:
+                if getattr(ex, "code", None) == 416 and have:
+                    break  # nothing left to send: the part is complete
+                attempt += 1
+                if attempt > retries or getattr(ex, "code", 500) < 500:
+                    raise
+                METRICS.count("download.resumed")
+                time.sleep(min(30, 2 ** attempt))
+
+    bad = _verify(part, size, sha256)
+    if bad:
+        os.remove(part)
+        raise ValueError(f"downloaded file rejected: {bad}")
+    os.replace(part, dest)
+    return dest
+
+
+def download_and_run_setup(url: str, filename_hint: str = "rTool-Setup.exe", size: int = 0, sha256: str = "",
+                           version: str = "", on_progress=None, on_done=None):
+    """Download the installer in the background (cached per version in UPDATES_DIR), verify it, run it.
+
+    on_done(ok, message) is called from the download thread.
+    """
+    def _download_thread():
+        name = os.path.basename(filename_hint or "rTool-Setup.exe")
+        folder = UPDATES_DIR / (version or "latest")
+        try:
+            out = download_file(url, str(folder / name), size, sha256, on_progress)
+            for old in UPDATES_DIR.iterdir():
+                if old != folder:
+                    shutil.rmtree(old, ignore_errors=True)
+            subprocess.Popen([out], shell=False)
+            ok, msg = True, f"Running {name}"
+        except Exception as ex:
+            METRICS.error("download", ex, url)
+            ok, msg = False, f"Update download failed: {ex}"
+        if on_done:
+            on_done(ok, msg)
+
+    t = threading.Thread(target=_download_thread, name="rtool-update-download", daemon=True)
+    t.start()
+
+
+# =========================
+#   APP CONFIG
+# =========================
+STEAM_DEFAULT = r"C:\Program Files (x86)\Steam"
+TARGET_NAME = "spprt.exe"
+
+
+def rtool_home() -> Path:
+    # RTOOL_HOME moves all state elsewhere (scripts, tests, non-Windows hosts).
+    return Path(os.getenv("RTOOL_HOME") or Path(os.getenv("PROGRAMDATA", r"C:\ProgramData")) / "rTool")
+
+
+# Created on first write (save_json, the name cache, logs), not at import.
+RTOOL_DIR = rtool_home()
+APPDATA_DIR = RTOOL_DIR
+STATE_FILE = APPDATA_DIR / "state.json"
+NAME_CACHE_FILE = APPDATA_DIR / "name_cache.json"  # legacy, migrated into NAME_CACHE_DB
+NAME_CACHE_DB = APPDATA_DIR / "names.sqlite3"
+RELEASE_CACHE_FILE = APPDATA_DIR / "release_cache.json"
+UPDATES_DIR = APPDATA_DIR / "updates"  # verified installers, one folder per version
+NESTED_MAX_DEPTH = 6
+
+
+# =========================
+#   METRICS
+# =========================
+METRICS_LOG = RTOOL_DIR / "metrics.log"
+
+
+class Metrics:
+    """Timing spans, counters and a rolling event log for the hot paths.
+
+    span(name) keeps the last `window` durations per name for p50/p95.
+    Errors (also the ones callers swallow, via error()) and spans slower than
+    `slow_ms` are appended to `log_path`, which rotates to .1 at `log_bytes`.
+    """
+
+    def __init__(self, log_path: Path, window: int = 512, slow_ms: float = 250, log_bytes: int = 1 << 20):
+        self.log_path = log_path
+        self.window = window
+        self.slow_ms = slow_ms
+        self.log_bytes = log_bytes
+        self._lock = threading.Lock()
+        self._samples = {}  # name -> deque of ms
+        self._totals = Counter()  # name -> spans recorded
+        self._errors = Counter()  # name -> failures
+        self.counters = Counter()
+
+    def span(self, name: str):
+        return _Span(self, name)
+
+    def record(self, name: str, ms: float, error=None):
+        with self._lock:
+            q = self._samples.get(name)
+            if q is None:
+                q = self._samples[name] = deque(maxlen=self.window)
+            q.append(ms)
+            self._totals[name] += 1
+            if error is not None:
+                self._errors[name] += 1
+        if error is not None:
+            self.log(f"error\t{name}\t{ms:.1f}ms\t{type(error).__name__}: {error}")
+        elif ms >= self.slow_ms:
+            self.log(f"slow\t{name}\t{ms:.1f}ms")
+
+    def error(self, name: str, ex, detail: str = ""):
+        """Count and log a failure the caller handles itself."""
+        with self._lock:
+            self._errors[name] += 1
+        self.log(f"error\t{name}\t{type(ex).__name__}: {ex}" + (f"\t{detail}" if detail else ""))
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def log(self, line: str):
+        try:
+            with self._lock:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    if self.log_path.stat().st_size > self.log_bytes:
+                        os.replace(self.log_path, self.log_path.with_name(self.log_path.name + ".1"))
+                except OSError:
+                    pass
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}\t{line}\n")
+        except Exception:
+            pass
+
+    def snapshot(self) -> dict:
+        """{"spans": {name: {count, errors, p50, p95, max, last}}, "counters": {...}} (times in ms)."""
+        with self._lock:
+            samples = {k: list(v) for k, v in self._samples.items()}
+            totals, errors, counters = dict(self._totals), dict(self._errors), dict(self.counters)
+        spans = {}
+        for name in sorted(set(samples) | set(errors)):
+            v = sorted(samples.get(name, ()))
+            spans[name] = {
+                "count": totals.get(name, 0), "errors": errors.get(name, 0),
+                "p50": round(v[len(v) // 2], 2) if v else None,
+                "p95": round(v[min(len(v) - 1, int(len(v) * 0.95))], 2) if v else None,
+                "max": round(v[-1], 2) if v else None,
+                "last": round(samples[name][-1], 2) if v else None,
+            }
+        return {"spans": spans, "counters": counters}
+
+
+class _Span:
+    __slots__ = ("m", "name", "t")
+
+    def __init__(self, m, name):
+        self.m, self.name = m, name
+
+    def __enter__(self):
+        self.t = time.perf_counter()
+        return self
+
+    def __exit__(self, et, ev, tb):
+        self.m.record(self.name, (time.perf_counter() - self.t) * 1000, ev)
+        return False
+
+
+METRICS = Metrics(METRICS_LOG)
+
+
+# =========================
+#   HTTP CLIENT
+# =========================
+class HttpError(OSError):
+    """Non-2xx/304 response; `code` and `headers` as on urllib's HTTPError."""
+
+    def __init__(self, code: int, reason: str, url: str, headers):
+        super().__init__(f"HTTP Error {code}: {reason}")
+        self.code, self.reason, self.url, self.headers = code, reason, url, headers
+
+
+class HttpClient:
+    """Keep-alive HTTP(S) client with a small connection pool per host.
+
+    One instance (HTTP) is shared by store lookups, update checks and the
+    downloader, so repeated requests reuse TCP/TLS connections. Responses
+    are gzip-decoded, `proxy` ("http://host:port") tunnels HTTPS via
+    CONNECT, and plain http:// works for local test servers. Redirects are
+    followed up to MAX_REDIRECTS hops with the same headers (Range
+    included). Counters go to METRICS (http.requests, http.reused,
+    http.redirects, http.errors.*).
+    """
+    RETRY_ERRORS = (ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+    REDIRECTS = (301, 302, 303, 307, 308)
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout: float = 10, proxy: str = None, max_idle: int = 4, user_agent: str = "Mozilla/5.0"):
+        self.timeout = timeout
+        self.proxy = proxy
+        self.max_idle = max_idle
+        self.user_agent = user_agent
+        self._idle = {}  # (scheme, host, port) -> [connections]
+        self._lock = threading.Lock()
+
+    def configure(self, timeout: float = None, proxy: str = None):
+        """Change timeout/proxy; proxy "" clears it. Pooled connections are dropped."""
+        if timeout:
+            self.timeout = float(timeout)
+        if proxy is not None:
+            self.proxy = proxy or None
+        self.close()
+
+    def close(self):
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for conns in pools.values():
+            for c in conns:
+                c.close()
+
+    def _proxy_for(self, scheme: str):
+        p = self.proxy or os.getenv(f"{scheme.upper()}_PROXY") or os.getenv(f"{scheme}_proxy")
+        if not p:
+            return None
+        from urllib.parse import urlsplit
+        u = urlsplit(p if "://" in p else f"http://{p}")
+        return u.hostname, u.port or 8080
+
+    def _connect(self, key, timeout):
+        import http.client
+        scheme, host, port = key
+        proxy = self._proxy_for(scheme)
+        if scheme == "https":
+            import ssl
+            ctx = ssl.create_default_context()
+            if proxy:
+                conn = http.client.HTTPSConnection(proxy[0], proxy[1], timeout=timeout, context=ctx)
+                conn.set_tunnel(host, port)
+            else:
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=ctx)
+        else:
+            conn = http.client.HTTPConnection(*(proxy or (host, port)), timeout=timeout)
+            conn._rtool_proxied = bool(proxy)
+        return conn
+
+    def _take(self, key, timeout):
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                conn = conns.pop()
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self._connect(key, timeout), False
+
+    def _give_back(self, key, conn):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_idle:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def _send(self, method, url, headers, timeout):
+        """(key, conn, response) with the body still unread; retries once on a stale pooled socket."""
+        from urllib.parse import urlsplit
+        u = urlsplit(url)
+        scheme = u.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL: {url}")
+        key = (scheme, u.hostname, u.port or (443 if scheme == "https" else 80))
+        target = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        hdrs = {"User-Agent": self.user_agent, "Connection": "keep-alive", **(headers or {})}
+        METRICS.count("http.requests")
+        for attempt in (0, 1):
+            conn, reused = self._take(key, timeout or self.timeout)
+            try:
+                path = url if getattr(conn, "_rtool_proxied", False) else target
+                conn.request(method, path, headers=hdrs)
+                resp = conn.getresponse()
+                if reused:
+                    METRICS.count("http.reused")
+                return key, conn, resp
+            except Exception as ex:
+                conn.close()
+                stale = reused and (isinstance(ex, self.RETRY_ERRORS) or type(ex).__name__ == "RemoteDisconnected")
+                if stale and attempt == 0:
+                    continue
+                METRICS.count("http.errors.network")
+                raise
+
+    def _finish(self, key, conn, resp):
+        if resp.will_close:
+            conn.close()
+        else:
+            self._give_back(key, conn)
+
+    def _open(self, method, url, headers, timeout):
+        """_send that follows redirects -> (final url, key, conn, response)."""
+        from urllib.parse import urljoin
+        for _ in range(self.MAX_REDIRECTS + 1):
+            key, conn, resp = self._send(method, url, headers, timeout)
+            location = resp.headers.get("Location") if resp.status in self.REDIRECTS else None
+            if not location:
+                return url, key, conn, resp
+            try:
+                resp.read()
+            except Exception:
+                conn.close()
+            else:
+                self._finish(key, conn, resp)
+            METRICS.count("http.redirects")
+            url = urljoin(url, location)
+            if resp.status == 303 and method != "HEAD":
+                method = "GET"
+        METRICS.count("http.errors.redirects")
+        raise HttpError(resp.status, f"more than {self.MAX_REDIRECTS} redirects", url, resp.headers)
+
+    def request(self, url: str, headers=None, timeout: float = None, method: str = "GET"):
+        """-> (status, body bytes, headers). Raises HttpError for >= 400."""
+        url, key, conn, resp = self._open(method, url, {"Accept-Encoding": "gzip", **(headers or {})}, timeout)
+        try:
+            body = resp.read()
+        except Exception:
+            conn.close()
+            METRICS.count("http.errors.network")
+            raise
+        self._finish(key, conn, resp)
+        if (resp.headers.get("Content-Encoding") or "").lower() == "gzip":
+            import gzip
+            body = gzip.decompress(body)
+        if resp.status >= 400:
+            METRICS.count(f"http.errors.{resp.status}")
+            raise HttpError(resp.status, resp.reason, url, resp.headers)
+        return resp.status, body, resp.headers
+
+    def get_json(self, url: str, headers=None, timeout: float = None):
+        """-> (status, parsed JSON or None for 304/empty, headers)."""
+        status, body, hdrs = self.request(url, headers, timeout)
+        return status, (json.loads(body) if body and status != 304 else None), hdrs
+
+    def stream(self, url: str, headers=None, timeout: float = None):
+        """Context manager yielding the raw response (status, headers, read(n)); no gzip.
+
+        Redirects are followed; `url` on the context manager is the final one.
+        """
+        return _Stream(self, url, headers, timeout)
+
+
+class _Stream:
+    def __init__(self, client, url, headers, timeout):
+        self.client, self.url, self.headers, self.timeout = client, url, headers, timeout
+
+    def __enter__(self):
+        self.url, self.key, self.conn, resp = self.client._open("GET", self.url, self.headers, self.timeout)
+        if resp.status >= 400:
+            resp.read()
+            self.client._finish(self.key, self.conn, resp)
+            METRICS.count(f"http.errors.{resp.status}")
+            raise HttpError(resp.status, resp.reason, self.url, resp.headers)
+        self.resp = resp
+        return resp
+
+    def __exit__(self, et, ev, tb):
+        if et is None and self.resp.isclosed():
+            self.client._finish(self.key, self.conn, self.resp)  # fully read: reusable
+        else:
+            self.conn.close()
+        return False
+
+
+HTTP = HttpClient()
+
+
+# =========================
+#   HELPERS
+# =========================
+def load_json(path: Path, default):
+    try:
+        if path.exists():
+            return json.loads(path.read_text("utf-8"))
+    except Exception:
+        pass
+    return default
+
+
+def save_json(path: Path, data):
+    with METRICS.span("save_json"):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(data, indent=2, ensure_ascii=False), "utf-8")
+        except Exception as ex:
+            METRICS.error("save_json", ex, str(path))
+
+
+def ensure_dir(p: str):
+    try:
+        os.makedirs(p, exist_ok=True)
+    except Exception:
+        pass
+
+
+def open_path(p: str) -> bool:
+    try:
+        if p and os.path.exists(p):
+            os.startfile(p)
+            return True
+    except Exception:
+        pass
+    return False
+
+
+def is_lua(p: str) -> bool:
+    return (p or "").lower().endswith(".lua")
+
+
+def is_manifest(p: str) -> bool:
+    low = (p or "").lower()
+    return low.endswith(".manifest") or low.endswith(".mfst")
+
+
+def is_archive(p: str) -> bool:
+    return (p or "").lower().endswith(".zip")
+
+
+IMPORT_SUFFIXES = (".lua", ".manifest", ".mfst", ".zip")
+
+
+def _dir_id(path: str, st=None):
+    st = st or os.stat(path)
+    return st.st_dev, st.st_ino
+
+
+def _scan_dir(path: str, depth: int, max_depth: int, suffixes):
+    """-> (matching files, [(subdir, depth, link id or None)]) for one directory; unreadable = empty."""
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    if e.is_dir():
+                        if depth >= max_depth:
+                            continue
+                        key = None
+                        if e.is_symlink() or getattr(e, "is_junction", bool)():
+                            # Only links can close a loop; plain subfolders are never stat'ed.
+                            key = _dir_id(e.path)
+                        subdirs.append((e.path, depth + 1, key))
+                    elif (suffixes is None or e.name.lower().endswith(suffixes)) and e.is_file():
+                        files.append(e.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def walk_files(root: str, max_depth: int = NESTED_MAX_DEPTH, suffixes=None, workers: int = 0):
+    """Yield files under `root` at most `max_depth` folders deep, breadth first.
+
+    `suffixes` (lower-case, e.g. IMPORT_SUFFIXES) drops other files before a
+    path is built. Symlinked and junction folders are followed once per
+    (device, inode). `workers` > 1 scans folders on a thread pool (for large
+    or network trees); the output order is the same either way, because
+    links are claimed in that order by the caller's thread, never by
+    whichever worker reaches them first.
+    """
+    root = os.fspath(root)
+    try:
+        st = os.stat(root)
+    except OSError:
+        return
+    if not os.path.isdir(root):
+        if suffixes is None or root.lower().endswith(suffixes):
+            yield root
+        return
+    seen = {_dir_id(root, st)}
+
+    def claim(subdirs):
+        for d, n, key in subdirs:
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield d, n
+
+    if workers <= 1:
+        todo = deque([(root, 0)])
+        while todo:
+            files, subdirs = _scan_dir(*todo.popleft(), max_depth, suffixes)
+            yield from files
+            todo.extend(claim(subdirs))
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rtool-walk") as pool:
+        todo = deque([pool.submit(_scan_dir, root, 0, max_depth, suffixes)])
+        try:
+            while todo:
+                files, subdirs = todo.popleft().result()
+                todo.extend(pool.submit(_scan_dir, d, n, max_depth, suffixes) for d, n in claim(subdirs))
+                yield from files
+        finally:
+            for f in todo:
+                f.cancel()
+
+
+# One pass over the file; the strong rules come first so their digits are
+# never picked up by the catch-all number branch.
+_APPID_RX = re.compile(
+    rb"addappid\s*\(\s*(?P<add>\d+)(?P<args>[^)\n]*)"
+    rb"|setmanifestid\s*\(\s*(?P<manifest>\d+)"
+    rb"|app[_\s-]*id\s*[:=]\s*(?P<assign>\d+)"
+    rb"|\b(?P<number>\d{4,7})\b",
+    re.IGNORECASE)
+# Same without the catch-all, used once a strong rule has matched.
+_APPID_STRONG_RX = re.compile(_APPID_RX.pattern.rsplit(b"|", 1)[0], re.IGNORECASE)
+
+LUA_SCAN_LIMIT = 4 * 1024 * 1024
+LUA_MMAP_MIN = 256 * 1024
+# Declarations sit in one block; once a strong rule has matched, this many
+# bytes (rounded up to the end of a line) without another one end the scan.
+LUA_DECL_GAP = 64 * 1024
+APPID_REVIEW_LOG = RTOOL_DIR / "appid_review.log"
+_REVIEW_LOGGED = None  # {(path, appids)} already in APPID_REVIEW_LOG, loaded on first use
+_REVIEW_LOCK = threading.Lock()
+
+# appids/depots are ordered tuples; rule says which pattern produced appids.
+LuaScan = namedtuple("LuaScan", "appids rule confidence depots")
+
+
+def scan_lua_appids(path: str) -> LuaScan:
+    """Return every app id a .lua file declares.
+
+    Keyless addappid(N) calls are apps (high confidence). addappid(N, 1, "key")
+    lines are depots and only count when nothing better exists; after that
+    come setmanifestid, app_id = N and finally any bare 4-7 digit number.
+    `depots` lists the keyed addappid and setmanifestid ids.
+    Only the first LUA_SCAN_LIMIT bytes are scanned, and the scan stops
+    LUA_DECL_GAP bytes after the last declaration once one has been seen.
+    """
+    apps, depots, manifests, assigns = [], [], [], []
+    number = b""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= LUA_MMAP_MIN:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buf = f.read(LUA_SCAN_LIMIT)
+            try:
+                end = min(len(buf), LUA_SCAN_LIMIT)
+                rx = _APPID_RX
+                pos = 0
+                while pos < end:
+                    stop = end
+                    if rx is not _APPID_RX and pos + LUA_DECL_GAP < end:
+                        stop = buf.find(b"\n", pos + LUA_DECL_GAP, end) + 1 or end
+                    m = rx.search(buf, pos, stop)
+                    if m and m.end() == stop < end:
+                        m = rx.search(buf, m.start(), end)  # may have been cut at the window edge
+                    if not m:
+                        break
+                    pos = m.end()
+                    if m.lastgroup == "number":
+                        if not number:
+                            number = m.group("number")
+                        continue
+                    if m.group("add"):
+                        (depots if b'"' in m.group("args") or b"'" in m.group("args") else apps).append(m.group("add"))
+                    elif m.group("manifest"):
+                        manifests.append(m.group("manifest"))
+                    else:
+                        assigns.append(m.group("assign"))
+                    rx = _APPID_STRONG_RX
+            finally:
+                if isinstance(buf, mmap.mmap):
+                    buf.close()
+    except Exception:
+        return LuaScan((), "", "", ())
+
+    depot_ids = _ordered_ids(depots + manifests)
+    if apps:
+        app_ids = _ordered_ids(apps)
+        return LuaScan(app_ids, "addappid", "high", tuple(d for d in depot_ids if d not in app_ids))
+    if depots:
+        return LuaScan(_ordered_ids(depots[:1]), "addappid_depot", "medium", depot_ids)
+    if manifests:
+        return LuaScan(_ordered_ids(manifests[:1]), "setmanifestid", "medium", depot_ids)
+    if assigns:
+        return LuaScan(_ordered_ids(assigns), "app_id", "medium", ())
+    if number:
+        return LuaScan(_ordered_ids([number]), "number", "low", ())
+    return LuaScan((), "", "", ())
+
+
+def _ordered_ids(raw):
+    return tuple(dict.fromkeys(x.decode("ascii").lstrip("0") or "0" for x in raw))
+
+
+def extract_appid_from_lua(path: str) -> str:
+    ids = scan_lua_appids(path).appids
+    return ids[0] if ids else ""
+
+
+def log_appid_review(path: str, scan: LuaScan):
+    """Append a non-high-confidence match to appid_review.log for manual review.
+
+    Each (file, app ids) pair is written once; re-parsing the same file with
+    the same result does not grow the log.
+    """
+    global _REVIEW_LOGGED
+    ids = ",".join(scan.appids) or "-"
+    with _REVIEW_LOCK:
+        if _REVIEW_LOGGED is None:
+            _REVIEW_LOGGED = set()
+            try:
+                with open(APPID_REVIEW_LOG, encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        parts = line.rstrip("\n").split("\t")
+                        if len(parts) == 5:
+                            _REVIEW_LOGGED.add((parts[4], parts[3]))
+            except Exception:
+                pass
+        if (path, ids) in _REVIEW_LOGGED:
+            return
+        try:
+            APPID_REVIEW_LOG.parent.mkdir(parents=True, exist_ok=True)
+            with open(APPID_REVIEW_LOG, "a", encoding="utf-8") as f:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}\t{scan.confidence}\t{scan.rule}\t{ids}\t{path}\n")
+            _REVIEW_LOGGED.add((path, ids))
+        except Exception:
+            pass
+
+
+# =========================
+#   LUA CATALOG
+# =========================
+CATALOG_FILE = APPDATA_DIR / "catalog.json"
+
+
+class LuaCatalog:
+    """Persisted index of stplug-in .lua files -> app ids.
+
+    Every entry is keyed by path and remembers (size, mtime_ns, inode), so a
+    rescan only parses files that were added or changed since the last one.
+    The depots each file references are indexed too (depot -> {paths}).
+    """
+    VERSION = 3
+    ENTRY_LEN = 7
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.root = ""
+        self.files = {}  # path -> [size, mtime_ns, inode, [appids], rule, confidence, [depots]]
+        self.loaded = False
+        self._depot_files = {}
+
+    def load(self, root: str):
+        data = load_json(self.path, {})
+        self.files = {}
+        if isinstance(data, dict) and data.get("version") == self.VERSION and data.get("root") == root:
+            files = data.get("files")
+            if isinstance(files, dict):
+                self.files = {k: v for k, v in files.items() if isinstance(v, list) and len(v) == self.ENTRY_LEN}
+        self.root = root
+        self.loaded = True
+        self._reindex_depots()
+
+    def _reindex_depots(self):
+        by_depot = {}
+        for fp, v in self.files.items():
+            for d in v[6]:
+                by_depot.setdefault(d, set()).add(fp)
+        self._depot_files = by_depot
+
+    def _index_depots(self, fp, entry, add: bool):
+        for d in (entry[6] if entry else ()):
+            if add:
+                self._depot_files.setdefault(d, set()).add(fp)
+            else:
+                paths = self._depot_files.get(d)
+                if paths is not None:
+                    paths.discard(fp)
+                    if not paths:
+                        del self._depot_files[d]
+
+    def depots_of(self, paths) -> set:
+        """Depot ids referenced by the given lua files."""
+        out = set()
+        for fp in paths:
+            v = self.files.get(fp)
+            if v:
+                out.update(v[6])
+        return out
+
+    def apps_for_depot(self, depot: str) -> set:
+        """App ids whose lua files reference `depot`."""
+        out = set()
+        for fp in self._depot_files.get(depot, ()):
+            out.update(self.files[fp][3])
+        return out
+
+    def save(self):
+        save_json(self.path, {"version": self.VERSION, "root": self.root, "files": self.files})
+
+    def scan(self, root: str, full: bool = False):
+        """Sync the catalog with `root`.
+
+        Returns (added, removed) as {path: (appids)} dicts; a changed file
+        shows up in both. With full=True every file is parsed again.
+        """
+        if full:
+            self.root, self.files, self.loaded = root, {}, True
+        elif not self.loaded or self.root != root:
+            self.load(root)
+        old = self.files
+        seen = {}
+        added, removed = {}, {}
+        dirty = full
+        with os.scandir(root) as it:
+            for e in it:
+                if not e.name.lower().endswith(".lua"):
+                    continue
+                try:
+                    if not e.is_file():
+                        continue
+                    st = e.stat()
+                    key = [st.st_size, st.st_mtime_ns, e.inode()]
+                except OSError:
+                    continue
+                fp = os.path.join(root, e.name)
+                prev = old.get(fp)
+                seen[fp] = self._sync_entry(fp, key, prev, added, removed)
+                if seen[fp] is not prev:
+                    dirty = True
+        for fp, prev in old.items():
+            if fp not in seen:
+                dirty = True
+                if prev[3]:
+                    removed[fp] = tuple(prev[3])
+        self.files = seen
+        if dirty:
+            self._reindex_depots()
+            self.save()
+        return added, removed
+
+    def update(self, root: str, names):
+        """Re-check only the given file names under `root`; same return as scan()."""
+        if not self.loaded or self.root != root:
+            return self.scan(root)
+        added, removed = {}, {}
+        dirty = False
+        for name in names:
+            if not is_lua(name):
+                continue
+            fp = os.path.join(root, name)
+            prev = self.files.get(fp)
+            try:
+                st = os.stat(fp)
+                ok = os.path.isfile(fp)
+            except OSError:
+                ok = False
+            if not ok:
+                if prev is not None:
+                    del self.files[fp]
+                    self._index_depots(fp, prev, False)
+                    dirty = True
+                    if prev[3]:
+                        removed[fp] = tuple(prev[3])
+                continue
+            entry = self._sync_entry(fp, [st.st_size, st.st_mtime_ns, st.st_ino], prev, added, removed)
+            if entry is not prev:
+                self.files[fp] = entry
+                self._index_depots(fp, prev, False)
+                self._index_depots(fp, entry, True)
+                dirty = True
+        if dirty:
+            self.save()
+        return added, removed
+
+    @staticmethod
+    def _sync_entry(fp, key, prev, added, removed):
+        if prev and prev[:3] == key:
+            return prev
+        scan = scan_lua_appids(fp)
+        if scan.appids and scan.confidence != "high":
+            log_appid_review(fp, scan)
+        if prev and prev[3]:
+            removed[fp] = tuple(prev[3])
+        if scan.appids:
+            added[fp] = scan.appids
+        return key + [list(scan.appids), scan.rule, scan.confidence, list(scan.depots)]
+
+    def games(self):
+        """Build {appid: [lua paths]}; a file is listed under every app it declares."""
+        out = {}
+        for fp, v in self.files.items():
+            for aid in v[3]:
+                out.setdefault(aid, []).append(fp)
+        return out
+
+
+# =========================
+#   DEPOT INDEX
+# =========================
+DEPOT_INDEX_FILE = APPDATA_DIR / "depot_index.json"
+_MANIFEST_NAME_RX = re.compile(r"^(\d+)_(\d+)\.(?:manifest|mfst)$", re.IGNORECASE)
+
+
+def parse_manifest_name(name: str):
+    """'<depot>_<manifest>.manifest' -> (depot, manifest), else None."""
+    m = _MANIFEST_NAME_RX.match(name)
+    return (m.group(1), m.group(2)) if m else None
+
+
+class DepotIndex:
+    """Persisted index of depotcache: manifest file name -> (depot id, manifest id).
+
+    Keeps depot -> {file names} in memory, so finding a game's manifests is
+    a lookup per depot instead of a directory listing plus substring tests.
+    """
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.root = ""
+        self.files = {}  # name -> [depot, manifest]
+        self._by_depot = {}
+        self.loaded = False
+
+    def _load(self, root: str):
+        data = load_json(self.path, {})
+        files = {}
+        if isinstance(data, dict) and data.get("version") == self.VERSION and data.get("root") == root:
+            raw = data.get("files")
+            if isinstance(raw, dict):
+                files = {k: v for k, v in raw.items() if isinstance(v, list) and len(v) == 2}
+        self.root, self.loaded = root, True
+        self.files, self._by_depot = {}, {}
+        for name, v in files.items():
+            self._add(name, v)
+
+    def save(self):
+        save_json(self.path, {"version": self.VERSION, "root": self.root, "files": self.files})
+
+    def _add(self, name, parsed):
+        self.files[name] = list(parsed)
+        self._by_depot.setdefault(parsed[0], set()).add(name)
+
+    def _remove(self, name):
+        v = self.files.pop(name, None)
+        if v is None: return
+        names = self._by_depot.get(v[0])
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._by_depot[v[0]]
+
+    def scan(self, root: str):
+        """Sync with the folder listing; only names not seen before get parsed."""
+        if not self.loaded or self.root != root:
+            self._load(root)
+        try:
+            with os.scandir(root) as it:
+                present = {e.name for e in it if is_manifest(e.name)}
+        except OSError:
+            present = set()
+        dirty = False
+        for name in [n for n in self.files if n not in present]:
+            self._remove(name)
+            dirty = True
+        for name in present:
+            if name not in self.files:
+                parsed = parse_manifest_name(name)
+                if parsed:
+                    self._add(name, parsed)
+                    dirty = True
+        if dirty:
+            self.save()
+
+    def update(self, root: str, names):
+        """Re-check only `names` (e.g. a watcher batch)."""
+        if not self.loaded or self.root != root:
+            self.scan(root)
+            return
+        dirty = False
+        for name in names:
+            if not is_manifest(name):
+                continue
+            exists = os.path.isfile(os.path.join(root, name))
+            if exists and name not in self.files:
+                parsed = parse_manifest_name(name)
+                if parsed:
+                    self._add(name, parsed)
+                    dirty = True
+            elif not exists and name in self.files:
+                self._remove(name)
+                dirty = True
+        if dirty:
+            self.save()
+
+    def files_for_depot(self, depot: str):
+        return sorted(self._by_depot.get(depot, ()))
+
+
+# =========================
+#   BUNDLED RESOURCES
+# =========================
+RESOURCE_DIR = RTOOL_DIR / "cache"
+BUNDLED_ASSETS = (TARGET_NAME, "steam.ico", "default.png")
+BUNDLE_DIGESTS = "assets.json"  # written next to the assets at build time by write_bundle_digests
+
+
+def write_bundle_digests(bundle_dir, assets=BUNDLED_ASSETS) -> dict:
+    """Record size and SHA-256 of each asset in `bundle_dir`/assets.json; run before packaging."""
+    bundle_dir = Path(bundle_dir)
+    out = {}
+    for name in assets:
+        for src in (bundle_dir / name, bundle_dir / "bin" / name):
+            if src.exists():
+                out[name] = {"size": src.stat().st_size, "sha256": _file_sha256(str(src)).hexdigest()}
+                break
+    save_json(bundle_dir / BUNDLE_DIGESTS, {"assets": out})
+    return out
+
+
+class ResourceCache:
+    """Bundled files extracted once per app version into `root`/<version>/.
+
+    manifest.json in the version folder records each asset's size and
+    SHA-256. The bundle's assets.json (from write_bundle_digests) gives the
+    expected digest of each bundled file, so a cached asset is checked
+    against it without reading the bundle; a rebuild under the same version
+    is re-extracted because its digest differs. Without assets.json a cached
+    asset is reused when its size matches the bundled file's, and the
+    bundled file is hashed only on a mismatch. Source mtimes are not used:
+    a onefile build re-extracts _MEIPASS with fresh ones on every launch.
+    An asset identical to one from an older version is moved over instead
+    of copied; older version folders are removed once every asset of this
+    version is in place. Outside a frozen build (`extract` False) files are
+    used where they are.
+    """
+
+    def __init__(self, bundle_dir=None, root: Path = RESOURCE_DIR, version: str = APP_VERSION,
+                 assets=BUNDLED_ASSETS, extract: bool = None):
+        frozen = getattr(sys, "_MEIPASS", None)
+        self.bundle = Path(bundle_dir or frozen or Path(__file__).parent)
+        self.extract = bool(frozen) if extract is None else extract
+        self.root = Path(root)
+        self.dir = self.root / version
+        self.version = version
+        self.assets = tuple(assets)
+        self._paths = {}
+        self._manifest = None
+        self._digests = None
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        """Usable path of bundled asset `name`, or "" when it is not bundled."""
+        hit = self._paths.get(name)
+        if hit and os.path.exists(hit):
+            return hit
+        with self._lock:
+            src = self._source(name)
+            if not src:
+                out = ""
+            elif not self.extract:
+                out = str(src)
+            else:
+                out = self._resolve(name, src)
+            if out:
+                self._paths[name] = out
+        if out and self.extract and self._complete():
+            self.prune()
+        return out
+
+    def warm(self):
+        """Extract every asset now (call from a worker thread)."""
+        for name in self.assets:
+            self.path(name)
+
+    def _source(self, name: str):
+        for src in (self.bundle / name, self.bundle / "bin" / name):
+            if src.exists():
+                return src
+        return None
+
+    def _load(self) -> dict:
+        if self._manifest is None:
+            self._manifest = load_json(self.dir / "manifest.json", {})
+            self._manifest.setdefault("assets", {})
+        return self._manifest
+
+    def _expected(self, name: str) -> dict:
+        if self._digests is None:
+            data = load_json(self.bundle / BUNDLE_DIGESTS, {})
+            self._digests = data.get("assets", {}) if isinstance(data, dict) else {}
+        return self._digests.get(name) or {}
+
+    def _resolve(self, name: str, src: Path) -> str:
+        entry = self._load()["assets"].get(name)
+        dst = self.dir / name
+        try:
+            present = bool(entry) and dst.stat().st_size == entry["size"]
+        except OSError:
+            present = False
+        expected = self._expected(name)
+        if expected:
+            if present and entry.get("sha256") == expected.get("sha256"):
+                return str(dst)
+            size, sha = expected.get("size"), expected.get("sha256")
+        else:
+            size = src.stat().st_size
+            if present and entry["size"] == size:
+                return str(dst)
+            sha = None
+        with METRICS.span("resource_extract"):
+            if not sha:
+                sha = _file_sha256(str(src)).hexdigest()
+            if not self._extract(name, src, sha, size):
+                return ""
+            save_json(self.dir / "manifest.json", self._manifest)
+        return str(dst)
+
+    def _complete(self) -> bool:
+        assets = self._load()["assets"]
+        return all(a in assets for a in self.assets if self._source(a))
+
+    def _extract(self, name: str, src: Path, sha: str, size: int) -> str:
+        dst = self.dir / name
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            old = self._previous(name, sha, size)
+            if old:
+                try:
+                    os.replace(old, dst)
+                except OSError:
+                    old = ""
+            if not old:
+                tmp = dst.with_name(dst.name + ".tmp")
+                shutil.copy2(src, tmp)
+                os.replace(tmp, dst)
+        except Exception as ex:
+            METRICS.error("resource_extract", ex, name)
+            return ""
+        manifest = self._load()
+        manifest["version"] = self.version
+        manifest["assets"][name] = {"size": size, "sha256": sha}
+        return str(dst)
+
+    def _previous(self, name: str, sha: str, size: int) -> str:
+        """Same content extracted by another version, if any."""
+        for d in self._others():
+            entry = load_json(d / "manifest.json", {}).get("assets", {}).get(name)
+            fp = d / name
+            if entry and entry.get("sha256") == sha and entry.get("size") == size and fp.exists():
+                return str(fp)
+        return ""
+
+    def _others(self):
+        try:
+            return [p for p in self.root.iterdir() if p != self.dir]
+        except OSError:
+            return []
+
+    def prune(self):
+        """Remove other versions' folders and files from the old flat cache layout."""
+        for p in self._others():
+            try:
+                if p.is_dir():
+                    shutil.rmtree(p, ignore_errors=True)  # a tool still running keeps its folder until next time
+                else:
+                    p.unlink()
+            except OSError:
+                pass
+
+
+RESOURCES = ResourceCache()
+
+
+def get_tool_path_for_run(target_name: str) -> str:
+    return RESOURCES.path(target_name)
+
+
+# =========================
+#   OFFLINE NAME DATABASE
+# =========================
+APPNAMES_FILE = APPDATA_DIR / "appnames.bin"
+
+
+class AppNameDB:
+    """Read-only app id -> name table built from a Steam app-list dump.
+
+    Layout (little endian): header (magic, version, count, reserved), count
+    sorted u32 ids, count + 1 u32 offsets, then the UTF-8 name blob. The file
+    is memory-mapped and looked up with a binary search. Lookups, reopening
+    and swap() all hold one lock, so a lookup never sees a closed or
+    half-replaced map.
+    """
+    MAGIC = b"RTAN"
+    VERSION = 1
+    HEADER = struct.Struct("<4sIII")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mm = None
+        self._count = 0
+        self._ids_at = self._offs_at = self._blob_at = 0
+        self._tried = False
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_open()
+            return self._count
+
+    def _ensure_open(self):
+        # Caller holds the lock.
+        if self._mm is None and not self._tried:
+            self._open()
+
+    def open(self) -> bool:
+        with self._lock:
+            return self._open()
+
+    def swap(self, new_file: Path):
+        """Move the fully built `new_file` over the database and map it.
+
+        Lookups wait for the swap instead of running against a closed map.
+        The old map is closed first because Windows refuses to replace a
+        mapped file.
+        """
+        with self._lock:
+            self._close()
+            try:
+                os.replace(new_file, self.path)
+            finally:
+                self._open()
+
+    def _open(self) -> bool:
+        self._close()
+        self._tried = True
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        try:
+            magic, ver, count, _ = self.HEADER.unpack_from(mm, 0)
+            ids_at = self.HEADER.size
+            offs_at = ids_at + 4 * count
+            blob_at = offs_at + 4 * (count + 1)
+            if magic != self.MAGIC or ver != self.VERSION or len(mm) < blob_at:
+                raise ValueError("bad app name database")
+        except (struct.error, ValueError):
+            mm.close()
+            return False
+        self._mm, self._count = mm, count
+        self._ids_at, self._offs_at, self._blob_at = ids_at, offs_at, blob_at
+        return True
+
+    def close(self):
+        with self._lock:
+            self._close()
+            self._tried = False
+
+    def _close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm, self._count = None, 0
+
+    def get(self, appid) -> str:
+        try:
+            key = int(appid)
+        except (TypeError, ValueError):
+            return ""
+        with self._lock:
+            self._ensure_open()
+            mm = self._mm
+            if mm is None:
+                return ""
+            lo, hi = 0, self._count - 1
+            unpack = struct.unpack_from
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                cur = unpack("<I", mm, self._ids_at + 4 * mid)[0]
+                if cur < key:
+                    lo = mid + 1
+                elif cur > key:
+                    hi = mid - 1
+                else:
+                    a, b = unpack("<II", mm, self._offs_at + 4 * mid)
+                    return mm[self._blob_at + a:self._blob_at + b].decode("utf-8", "replace")
+        return ""
+
+    @classmethod
+    def build(cls, src: str, out: Path) -> int:
+        """Convert an app-list JSON dump into the binary format; returns the app count.
+
+        Accepts ISteamApps/GetAppList ({"applist": {"apps": [...]}}),
+        IStoreService/GetAppList ({"response": {"apps": [...]}}), a plain list
+        of {"appid", "name"} objects or a flat {"appid": "name"} mapping.
+        """
+        with open(src, "r", encoding="utf-8-sig") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            for k in ("applist", "response"):
+                if isinstance(data.get(k), dict):
+                    data = data[k].get("apps", [])
+                    break
+        if isinstance(data, dict):
+            pairs = data.items()
+        else:
+            pairs = ((a.get("appid"), a.get("name")) for a in data if isinstance(a, dict))
+
+        names = {}
+        for aid, name in pairs:
+            try:
+                aid = int(aid)
+            except (TypeError, ValueError):
+                continue
+            name = (name or "").strip() if isinstance(name, str) else ""
+            if 0 <= aid <= 0xFFFFFFFF and name and aid not in names:
+                names[aid] = name
+
+        ids = sorted(names)
+        blob = bytearray()
+        offs = [0]
+        for aid in ids:
+            blob += names[aid].encode("utf-8")
+            offs.append(len(blob))
+        tmp = out.with_name(out.name + ".tmp")
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(ids), 0))
+            f.write(struct.pack(f"<{len(ids)}I", *ids))
+            f.write(struct.pack(f"<{len(offs)}I", *offs))
+            f.write(blob)
+        os.replace(tmp, out)
+        return len(ids)
+
+
+_NAME_DB = AppNameDB(APPNAMES_FILE)
+
+
+def import_app_list(src: str) -> int:
+    """Rebuild the offline name database from `src` and swap it in.
+
+    The new table is built next to the old one, which keeps answering
+    lookups until the swap.
+    """
+    staging = APPNAMES_FILE.with_name(APPNAMES_FILE.name + ".new")
+    count = AppNameDB.build(src, staging)
+    _NAME_DB.swap(staging)
+    return count
+
+
+# =========================
+#   NAME CACHE (SQLite)
+# =========================
+class NameCache:
+    """App id -> name cache in SQLite (WAL mode) with batched commits.
+
+    Every row has fetched_at and ttl (seconds, 0 = never expires). A NULL
+    name is a negative entry: the store had no name for that id. Writes are
+    buffered and committed together once `batch_size` rows are pending or
+    `flush_delay` seconds have passed.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS names (
+            appid TEXT PRIMARY KEY,
+            name TEXT,
+            fetched_at REAL NOT NULL,
+            ttl REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, path: Path, legacy_json: Path = None, batch_size: int = 64, flush_delay: float = 2.0):
+        self.path = path
+        self.legacy_json = legacy_json
+        self.batch_size = batch_size
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._db = None
+        self._pending = {}  # appid -> (name, fetched_at, ttl)
+        self._timer = None
+
+    def _conn(self):
+        import sqlite3
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(self.SCHEMA)
+            self._db = db
+            self._migrate_json()
+        return self._db
+
+    def _migrate_json(self):
+        """One-time import of the old name_cache.json."""
+        db = self._db
+        if not self.legacy_json or db.execute("SELECT 1 FROM meta WHERE key='json_migrated'").fetchone():
+            return
+        data = load_json(self.legacy_json, {})
+        now = time.time()
+        rows = [(str(k), v, now, 0) for k, v in data.items() if isinstance(v, str) and v] if isinstance(data, dict) else []
+        db.execute("BEGIN")
+        try:
+            db.executemany("INSERT OR IGNORE INTO names VALUES (?, ?, ?, ?)", rows)
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('json_migrated', ?)", (str(len(rows)),))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        try:
+            if self.legacy_json.exists():
+                os.replace(self.legacy_json, self.legacy_json.with_name(self.legacy_json.name + ".migrated"))
+        except OSError:
+            pass
+
+    def lookup(self, appid: str):
+        """Name for a fresh positive entry, "" for a fresh negative one, None on a miss."""
+        import sqlite3
+        with self._lock:
+            row = self._pending.get(appid)
+            if row is None:
+                try:
+                    row = self._conn().execute(
+                        "SELECT name, fetched_at, ttl FROM names WHERE appid=?", (appid,)).fetchone()
+                except sqlite3.Error:
+                    return None
+        if row is None:
+            return None
+        name, fetched_at, ttl = row
+        if ttl and fetched_at + ttl < time.time():
+            return None
+        return name or ""
+
+    def get(self, appid: str) -> str:
+        return self.lookup(appid) or ""
+
+    def put(self, appid: str, name: str, ttl: float = 0):
+        self._queue(appid, (name, time.time(), ttl))
+
+    def put_negative(self, appid: str, ttl: float):
+        self._queue(appid, (None, time.time(), ttl))
+
+    def _queue(self, appid, row):
+        with self._lock:
+            self._pending[appid] = row
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        import sqlite3
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            rows = [(k,) + v for k, v in self._pending.items()]
+            try:
+                db = self._conn()
+                db.execute("BEGIN")
+                try:
+                    db.executemany("INSERT OR REPLACE INTO names VALUES (?, ?, ?, ?)", rows)
+                    db.execute("COMMIT")
+                except Exception:
+                    db.execute("ROLLBACK")
+                    raise
+                self._pending.clear()
+            except sqlite3.Error:
+                pass
+
+    def count(self) -> int:
+        import sqlite3
+        with self._lock:
+            try:
+                return self._conn().execute("SELECT COUNT(*) FROM names WHERE name IS NOT NULL").fetchone()[0]
+            except sqlite3.Error:
+                return 0
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_NAME_CACHE = NameCache(NAME_CACHE_DB, legacy_json=NAME_CACHE_FILE)
+
+
+def req_json(url: str, timeout=2):
+    return HTTP.get_json(url, timeout=timeout)[1]
+
+
+def cached_game_name(appid: str) -> str:
+    """Name from the local cache or the offline database, without touching the network."""
+    if not appid: return ""
+    return _NAME_CACHE.get(appid) or _NAME_DB.get(appid)
+
+
+def is_known_unnamed(appid: str) -> bool:
+    """True while a negative cache entry says the store has no name for `appid`."""
+    return _NAME_CACHE.lookup(appid) == ""
+
+
+def fetch_game_name(appid: str) -> str:
+    """One store lookup. Returns "" when the store has no name; network errors propagate."""
+    url = f"https://store.steampowered.com/api/appdetails?appids={appid}&cc=us&l=en"
+    with METRICS.span("get_game_name"):
+        data = req_json(url, timeout=6)
+    block = data.get(str(appid))
+    if block and block.get("success") and isinstance(block.get("data"), dict):
+        return (block["data"].get("name") or "").strip()
+    return ""
+
+
+def remember_game_name(appid: str, name: str):
+    _NAME_CACHE.put(appid, name)
+
+
+def get_game_name(appid: str) -> str:
+    if not appid: return ""
+    name = cached_game_name(appid)
+    if name:
+        return name
+    if is_known_unnamed(appid):
+        return f"App {appid}"
+    for _ in range(3):
+        try:
+            name = fetch_game_name(appid)
+            if name:
+                remember_game_name(appid, name)
+                return name
+            break
+        except Exception as ex:
+            METRICS.error("get_game_name", ex, appid)
+            time.sleep(0.35)
+    return f"App {appid}"
+
+
+# =========================
+#   NAME RESOLVER
+# =========================
+class TokenBucket:
+    """Thread-safe token bucket whose rate backs off on throttling (AIMD)."""
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.05):
+        self.max_rate = self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, stop: threading.Event) -> bool:
+        """Block until a token is available; False if `stop` gets set first."""
+        while not stop.is_set():
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            stop.wait(wait)
+        return False
+
+    def slow_down(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+    def speed_up(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class NameResolver:
+    """Resolves unknown app names on a bounded worker pool.
+
+    Ids are queued with submit(); the dispatcher sleeps while nothing is due.
+    Requests go through a token bucket, network failures back off per id
+    (exponential with jitter), and ids the store has no name for are stored
+    as negative name-cache entries for `fail_ttl` seconds. `on_resolved(appid, name)` is
+    called from a worker thread.
+    """
+
+    def __init__(self, on_resolved, workers: int = 4, rate: float = 0.6, burst: int = 5,
+                 fail_ttl: float = 6 * 3600, base_backoff: float = 10, max_backoff: float = 1800):
+        self.on_resolved = on_resolved
+        self.workers = workers
+        self.fail_ttl = fail_ttl
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate, burst)
+
+        self._cv = threading.Condition()
+        self._stop = threading.Event()
+        self._heap = []  # (due, seq, appid)
+        self._queued = set()
+        self._inflight = set()
+        self._fails = {}  # appid -> consecutive network failures
+        self._seq = 0
+        self._slots = threading.BoundedSemaphore(workers)
+        self._pool = None
+        self._thread = None
+        self.counters = {"requests": 0, "resolved": 0, "not_found": 0, "errors": 0, "throttled": 0}
+        self._busy_since = None
+        self._busy_time = 0.0
+
+    def start(self):
+        if self._thread: return
+        from concurrent.futures import ThreadPoolExecutor
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rtool-names")
+        self._thread = threading.Thread(target=self._dispatch, name="rtool-names-dispatch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        with self._cv:
+            self._cv.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, appids):
+        appids = [aid for aid in appids if aid and not is_known_unnamed(aid)]
+        now = time.monotonic()
+        with self._cv:
+            added = False
+            for aid in appids:
+                if aid in self._queued or aid in self._inflight:
+                    continue
+                self._push(aid, now)
+                added = True
+            if added:
+                self._cv.notify()
+
+    def _push(self, aid, due):
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, aid))
+        self._queued.add(aid)
+        if self._busy_since is None:
+            self._busy_since = time.monotonic()
+
+    def queue_depth(self) -> int:
+        with self._cv:
+            return len(self._queued) + len(self._inflight)
+
+    def stats(self) -> dict:
+        with self._cv:
+            busy = self._busy_time + (time.monotonic() - self._busy_since if self._busy_since else 0.0)
+            out = dict(self.counters)
+            out.update(queued=len(self._queued), inflight=len(self._inflight),
+                       rate_limit=round(self.bucket.rate, 3),
+                       busy_seconds=round(busy, 2),
+                       names_per_min=round(60 * self.counters["resolved"] / busy, 2) if busy > 0 else 0.0)
+        return out
+
+    def _next_due(self):
+        """Pop the next due id, or return (None, seconds_to_wait)."""
+        if not self._heap:
+            if self._busy_since is not None and not self._inflight:
+                self._busy_time += time.monotonic() - self._busy_since
+                self._busy_since = None
+            return None, None
+        due, _, aid = self._heap[0]
+        wait = due - time.monotonic()
+        if wait > 0:
+            return None, wait
+        heapq.heappop(self._heap)
+        self._queued.discard(aid)
+        return aid, 0
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            with self._cv:
+                aid, wait = self._next_due()
+                if aid is None:
+                    self._cv.wait(wait)
+                    continue
+                self._inflight.add(aid)
+            if not self.bucket.acquire(self._stop) or not self._acquire_slot():
+                break
+            try:
+                self._pool.submit(self._work, aid)
+            except RuntimeError:
+                self._slots.release()
+                break
+
+    def _acquire_slot(self) -> bool:
+        while not self._stop.is_set():
+            if self._slots.acquire(timeout=0.5):
+                return True
+        return False
+
+    def _work(self, aid):
+        name = ""
+        try:
+            name = cached_game_name(aid)
+            if not name:
+                with self._cv:
+                    self.counters["requests"] += 1
+                name = fetch_game_name(aid)
+                self.bucket.speed_up()
+                if name:
+                    remember_game_name(aid, name)
+        except Exception as ex:
+            self._on_error(aid, ex)
+            return
+        finally:
+            self._slots.release()
+        with self._cv:
+            self._inflight.discard(aid)
+            self._fails.pop(aid, None)
+            if name:
+                self.counters["resolved"] += 1
+            else:
+                self.counters["not_found"] += 1
+        if not name:
+            _NAME_CACHE.put_negative(aid, self.fail_ttl)
+        if name and not self._stop.is_set():
+            try:
+                self.on_resolved(aid, name)
+            except Exception:
+                pass
+
+    def _on_error(self, aid, ex):
+        throttled = getattr(ex, "code", None) in (403, 429)
+        if throttled:
+            self.bucket.slow_down()
+        with self._cv:
+            self._inflight.discard(aid)
+            self.counters["throttled" if throttled else "errors"] += 1
+            n = self._fails[aid] = self._fails.get(aid, 0) + 1
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (n - 1))
+            self._push(aid, time.monotonic() + delay * random.uniform(0.8, 1.2))
+            self._cv.notify()
+
+
+# =========================
+#   IMPORT ENGINE
+# =========================
+HASH_CACHE_FILE = APPDATA_DIR / "hash_cache.json"
+
+
+def stat_key(st) -> list:
+    """(size, mtime_ns, inode), the same validity key LuaCatalog uses."""
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+class FileHashCache:
+    """blake2b digests keyed by path, reused while the stat key still matches."""
+    MAX_ENTRIES = 100000
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries = None
+        self._used = set()
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def digest(self, path: str, st=None) -> str:
+        st = st or os.stat(path)
+        key = stat_key(st)
+        with self._lock:
+            if self._entries is None:
+                data = load_json(self.path, {})
+                self._entries = data if isinstance(data, dict) else {}
+            hit = self._entries.get(path)
+            self._used.add(path)
+        if hit and hit[:3] == key:
+            return hit[3]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        d = h.hexdigest()
+        with self._lock:
+            self._entries[path] = key + [d]
+            self._dirty = True
+        return d
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or self._entries is None: return
+            if len(self._entries) > self.MAX_ENTRIES:
+                self._entries = {k: v for k, v in self._entries.items() if k in self._used}
+            save_json(self.path, self._entries)
+            self._dirty = False
+
+
+_HASH_CACHE = FileHashCache(HASH_CACHE_FILE)
+
+FICLONE = 0x40049409  # linux/fs.h
+
+
+def _reflink(src: str, dst: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+
+
+def place_file(src: str, dst: str, link_mode: str = "auto", src_st=None) -> str:
+    """Put `src` at `dst` via a temp name and an atomic replace.
+
+    link_mode "auto" tries a reflink, then a hardlink when both sit on the
+    same volume, then a copy; "reflink" and "hardlink" try only that one
+    before copying; "copy" always copies. Returns the method used.
+    Never writes through an existing `dst`, which might be a hardlink back
+    to some source file.
+    """
+    tmp = f"{dst}.rtool-tmp"
+    try:
+        os.remove(tmp)
+    except OSError:
+        pass
+    how = "copy"
+    if link_mode in ("auto", "reflink") and _reflink(src, tmp):
+        how = "reflink"
+    elif link_mode in ("auto", "hardlink"):
+        try:
+            src_st = src_st or os.stat(src)
+            if src_st.st_dev == os.stat(os.path.dirname(dst) or ".").st_dev:
+                os.link(src, tmp)
+                how = "hardlink"
+        except OSError:
+            pass
+    try:
+        if how == "copy":
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return how
+
+
+ZIP_CHUNK = 1 << 20
+
+# A file inside a zip archive used as an import source.
+ZipMember = namedtuple("ZipMember", "archive name size mtime")
+
+
+def iter_zip_members(archive: str, max_depth: int = 6):
+    """Yield ZipMember for every regular file at most `max_depth` folders deep."""
+    import zipfile
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            parts = PurePosixPath(info.filename.replace("\\", "/")).parts
+            if not parts or ".." in parts or len(parts) - 1 > max_depth:
+                continue
+            yield ZipMember(archive, info.filename, info.file_size,
+                            time.mktime(info.date_time + (0, 0, -1)))
+
+
+def zip_member_digest(zf: zipfile.ZipFile, m: ZipMember) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with zf.open(m.name) as f:
+        for chunk in iter(lambda: f.read(ZIP_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def place_zip_member(zf: zipfile.ZipFile, m: ZipMember, dst: str) -> str:
+    """Stream one member to `dst` in ZIP_CHUNK pieces via a temp name."""
+    tmp = f"{dst}.rtool-tmp"
+    try:
+        with zf.open(m.name) as fsrc, open(tmp, "wb") as fdst:
+            shutil.copyfileobj(fsrc, fdst, ZIP_CHUNK)
+        os.utime(tmp, (m.mtime, m.mtime))
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return "unzip"
+
+
+class ImportJob:
+    """Copies .lua / manifest files from dropped paths into Steam.
+
+    Sources may be files, folders or .zip archives (also archives found
+    inside dropped folders); archive members are streamed straight into
+    place without extracting anything else.
+
+    run() pre-scans every source to count the work, then copies on a pool of
+    `workers` threads. `on_progress(done, total)` is called as files finish
+    (throttled); cancel() stops the job between files.
+
+    A destination that already exists is compared by size and then by a
+    cached hash: identical files are skipped, different ones are reported as
+    conflicts and overwritten or left alone depending on `on_conflict`.
+    """
+    PROGRESS_EVERY = 0.05
+
+    def __init__(self, paths, stplugin: str, depotcache: str, workers: int = 4,
+                 on_progress=None, max_depth: int = NESTED_MAX_DEPTH,
+                 on_conflict: str = "overwrite", link_mode: str = "auto", hashes: FileHashCache = None,
+                 walk_workers: int = 0):
+        self.paths = [p for p in paths if p]
+        self.stplugin = stplugin
+        self.depotcache = depotcache
+        self.workers = workers
+        self.on_progress = on_progress
+        self.max_depth = max_depth
+        self.walk_workers = walk_workers
+        self.on_conflict = on_conflict
+        self.link_mode = link_mode
+        self.hashes = hashes or _HASH_CACHE
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._zips = []
+        self._last_emit = 0.0
+        self.done = 0
+        self.total = 0
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def plan(self, errors):
+        """[(src, dst)] for every matching file; the last source wins per destination."""
+        import zipfile
+        jobs = {}
+
+        def add(src, name):
+            if is_lua(name):
+                jobs[os.path.join(self.stplugin, os.path.basename(name))] = src
+            elif is_manifest(name):
+                jobs[os.path.join(self.depotcache, os.path.basename(name))] = src
+
+        for p in self.paths:
+            if self.cancelled: break
+            try:
+                for fp in walk_files(p, self.max_depth, IMPORT_SUFFIXES, self.walk_workers):
+                    if is_archive(fp):
+                        try:
+                            for m in iter_zip_members(fp, self.max_depth):
+                                add(m, m.name.replace("\\", "/").rsplit("/", 1)[-1])
+                        except (zipfile.BadZipFile, OSError) as ex:
+                            errors.append(f"{fp}: {ex}")
+                    else:
+                        add(fp, fp)
+            except Exception as ex:
+                errors.append(f"{p}: {ex}")
+        return [(src, dst) for dst, src in jobs.items()]
+
+    def _zip(self, archive: str) -> zipfile.ZipFile:
+        """Per-thread ZipFile handle so workers can stream members in parallel."""
+        import zipfile
+        handles = getattr(self._local, "zips", None)
+        if handles is None:
+            handles = self._local.zips = {}
+        zf = handles.get(archive)
+        if zf is None:
+            zf = handles[archive] = zipfile.ZipFile(archive)
+            with self._lock:
+                self._zips.append(zf)
+        return zf
+
+    def run(self) -> dict:
+        t0 = time.perf_counter()
+        errors = []
+        jobs = self.plan(errors)
+        self.total = len(jobs)
+        self._progress(force=True)
+        copied, identical, conflicts, linked = [], [], [], 0
+        if jobs and not self.cancelled:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rtool-import") as pool:
+                outcomes = list(pool.map(self._copy_one, jobs))
+            for zf in self._zips:
+                zf.close()
+            for dst, outcome in outcomes:
+                if outcome == "identical":
+                    identical.append(dst)
+                    continue
+                if outcome.startswith("conflict"):
+                    conflicts.append(dst)
+                    outcome = outcome.partition(":")[2]
+                if outcome in ("copy", "reflink", "hardlink", "unzip"):
+                    copied.append(dst)
+                    linked += outcome in ("reflink", "hardlink")
+                elif outcome.startswith("error:"):
+                    errors.append(outcome[6:])
+        self.hashes.save()
+        self._progress(force=True)
+        METRICS.record("import_from_paths", (time.perf_counter() - t0) * 1000)
+        METRICS.count("import.copied", len(copied))
+        METRICS.count("import.identical", len(identical))
+        METRICS.count("import.errors", len(errors))
+        return {
+            "total": self.total,
+            "copied": copied,
+            "identical": identical,
+            "conflicts": conflicts,
+            "linked": linked,
+            "errors": errors,
+            "cancelled": self.cancelled,
+        }
+
+    def _copy_one(self, job):
+        """Returns (dst, outcome); outcome is the placement method, "identical",
+        "conflict:<method|skipped>", "cancelled" or "error:<message>"."""
+        src, dst = job
+        if self.cancelled:
+            return dst, "cancelled"
+        if isinstance(src, ZipMember):
+            return self._unzip_one(src, dst)
+        try:
+            src_st = os.stat(src)
+            prefix = ""
+            try:
+                dst_st = os.stat(dst)
+            except FileNotFoundError:
+                dst_st = None
+            if dst_st is not None:
+                if os.path.samestat(src_st, dst_st):
+                    return dst, "identical"
+                if (src_st.st_size == dst_st.st_size
+                        and self.hashes.digest(src, src_st) == self.hashes.digest(dst, dst_st)):
+                    return dst, "identical"
+                if self.on_conflict == "skip":
+                    return dst, "conflict:skipped"
+                prefix = "conflict:"
+            return dst, prefix + place_file(src, dst, self.link_mode, src_st)
+        except Exception as ex:
+            return dst, f"error:{src}: {ex}"
+        finally:
+            with self._lock:
+                self.done += 1
+            self._progress()
+
+    def _unzip_one(self, m: ZipMember, dst: str):
+        try:
+            zf = self._zip(m.archive)
+            prefix = ""
+            try:
+                dst_st = os.stat(dst)
+            except FileNotFoundError:
+                dst_st = None
+            if dst_st is not None:
+                if m.size == dst_st.st_size and zip_member_digest(zf, m) == self.hashes.digest(dst, dst_st):
+                    return dst, "identical"
+                if self.on_conflict == "skip":
+                    return dst, "conflict:skipped"
+                prefix = "conflict:"
+            return dst, prefix + place_zip_member(zf, m, dst)
+        except Exception as ex:
+            return dst, f"error:{m.archive}!{m.name}: {ex}"
+        finally:
+            with self._lock:
+                self.done += 1
+            self._progress()
+
+    def _progress(self, force: bool = False):
+        if not self.on_progress: return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_emit < self.PROGRESS_EVERY and self.done < self.total:
+                return
+            self._last_emit = now
+            done, total = self.done, self.total
+        self.on_progress(done, total)
+
+
+# =========================
+#   BULK OPERATIONS
+# =========================
+TRASH_DIR = RTOOL_DIR / "trash"
+TRASH_KEEP_DAYS = 30
+
+
+def move_to_trash(files, trash_root: Path = TRASH_DIR, apps=()):
+    """Move `files` into a new timestamped batch under `trash_root` in one pass.
+
+    The batch keeps an index.json of (trash path, original path) pairs so it
+    can be restored. Returns (moved original paths, errors).
+    """
+    batch = trash_root / time.strftime("%Y%m%d-%H%M%S")
+    n = 1
+    while batch.exists():
+        n += 1
+        batch = trash_root / f"{time.strftime('%Y%m%d-%H%M%S')}-{n}"
+    moved, errors, pairs = [], [], []
+    for fp in files:
+        sub = batch / os.path.basename(os.path.dirname(fp))
+        dst = sub / os.path.basename(fp)
+        try:
+            sub.mkdir(parents=True, exist_ok=True)
+            shutil.move(fp, dst)
+            moved.append(fp)
+            pairs.append([str(dst), fp])
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            errors.append(f"{fp}: {ex}")
+    if pairs:
+        save_json(batch / "index.json", {"created": time.time(), "apps": list(apps), "files": pairs})
+    return moved, errors
+
+
+def trash_batches(trash_root: Path = TRASH_DIR):
+    """Batch folders, newest first."""
+    try:
+        return sorted((p for p in trash_root.iterdir() if (p / "index.json").exists()), reverse=True)
+    except OSError:
+        return []
+
+
+def restore_trash_batch(batch: Path):
+    """Move a batch's files back; returns (restored original paths, errors)."""
+    data = load_json(batch / "index.json", {})
+    restored, errors = [], []
+    for src, orig in data.get("files", []):
+        try:
+            if os.path.exists(orig):
+                errors.append(f"{orig}: already exists")
+                continue
+            os.makedirs(os.path.dirname(orig), exist_ok=True)
+            shutil.move(src, orig)
+            restored.append(orig)
+        except Exception as ex:
+            errors.append(f"{orig}: {ex}")
+    if not errors:
+        shutil.rmtree(batch, ignore_errors=True)
+    return restored, errors
+
+
+def prune_trash(trash_root: Path = TRASH_DIR, keep_days: int = TRASH_KEEP_DAYS):
+    cutoff = time.time() - keep_days * 86400
+    for batch in trash_batches(trash_root):
+        if load_json(batch / "index.json", {}).get("created", cutoff) < cutoff:
+            shutil.rmtree(batch, ignore_errors=True)
+
+
+def export_files(files, out_zip: str):
+    """Write files into a zip as stplug-in/... and depotcache/..., importable again."""
+    import zipfile
+    tmp = f"{out_zip}.rtool-tmp"
+    errors = []
+    written = 0
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+        for fp in files:
+            try:
+                zf.write(fp, f"{os.path.basename(os.path.dirname(fp))}/{os.path.basename(fp)}")
+                written += 1
+            except Exception as ex:
+                errors.append(f"{fp}: {ex}")
+    os.replace(tmp, out_zip)
+    return written, errors
+
+
+# =========================
+#   ARTWORK CACHE
+# =========================
+ARTWORK_DIR = RTOOL_DIR / "artwork"
+ARTWORK_MAX_BYTES = 64 * 1024 * 1024
+ARTWORK_URL = "https://cdn.akamai.steamstatic.com/steam/apps/{appid}/header.jpg"
+ARTWORK_MISS_TTL = 7 * 86400  # re-ask the CDN about apps without artwork after a week
+_IMAGE_MAGIC = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n", b"GIF8", b"BM", b"RIFF")
+
+
+def _is_image(data: bytes) -> bool:
+    return any(data.startswith(m) for m in _IMAGE_MAGIC)
+
+
+class ArtworkCache:
+    """Per-game header images on disk, trimmed least-recently-used first.
+
+    Files are named <appid>.<kind>: "img" is the source image (fetched from the
+    CDN or imported by the user), other kinds are scaled copies the GUI writes
+    once. index.json keeps {file: [size, last_used]} plus the apps the CDN had
+    no artwork for. Thread-safe; the index is written on put() and flush().
+    """
+
+    def __init__(self, root: Path = ARTWORK_DIR, max_bytes: int = ARTWORK_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._files = None
+        self._misses = {}
+        self._dirty = False
+
+    def _load(self):
+        # under self._lock
+        if self._files is not None:
+            return self._files
+        data = load_json(self.root / "index.json", {})
+        known = data.get("files", {})
+        self._misses = data.get("misses", {})
+        self._files = {}
+        try:
+            with os.scandir(self.root) as it:
+                for e in it:
+                    if e.name == "index.json" or not e.is_file() or e.name.endswith(".tmp"):
+                        continue
+                    st = e.stat()
+                    used = known.get(e.name, [0, st.st_mtime])[1]
+                    self._files[e.name] = [st.st_size, used]
+        except OSError:
+            pass
+        self._dirty = self._files.keys() != known.keys()
+        return self._files
+
+    def path(self, appid: str, kind: str = "img") -> str:
+        """Cached file for (appid, kind) or ""; counts as a use for the LRU order."""
+        name = f"{appid}.{kind}"
+        with self._lock:
+            entry = self._load().get(name)
+            if entry is None:
+                return ""
+            fp = self.root / name
+            if not fp.exists():
+                del self._files[name]
+                self._dirty = True
+                return ""
+            entry[1] = time.time()
+            self._dirty = True
+        return str(fp)
+
+    def put(self, appid: str, data: bytes, kind: str = "img") -> str:
+        name = f"{appid}.{kind}"
+        fp = self.root / name
+        tmp = self.root / f"{name}.tmp"
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            os.replace(tmp, fp)
+        except Exception as ex:
+            METRICS.error("artwork_put", ex, name)
+            return ""
+        with self._lock:
+            self._load()[name] = [len(data), time.time()]
+            self._misses.pop(str(appid), None)
+            self._evict()
+            self._save()
+        return str(fp)
+
+    def import_image(self, appid: str, src: str) -> str:
+        """Use a local image as the app's artwork; replaces its scaled copies."""
+        with open(src, "rb") as f:
+            data = f.read()
+        if not _is_image(data):
+            raise ValueError(f"{os.path.basename(src)} is not a JPEG, PNG, GIF, BMP or WebP image")
+        self.forget(appid)
+        return self.put(appid, data, "img")
+
+    def fetch(self, appid: str, timeout: float = 8) -> str:
+        """Download the store header image; "" when the app has none (remembered)."""
+        with self._lock:
+            self._load()
+            if time.time() - self._misses.get(str(appid), 0) < ARTWORK_MISS_TTL:
+                return ""
+        try:
+            with METRICS.span("artwork_fetch"):
+                _, body, _ = HTTP.request(ARTWORK_URL.format(appid=appid), timeout=timeout)
+        except HttpError as ex:
+            if ex.code != 404:
+                raise
+            body = b""
+        if not _is_image(body):
+            with self._lock:
+                self._misses[str(appid)] = time.time()
+                self._dirty = True
+            return ""
+        return self.put(appid, body, "img")
+
+    def source(self, appid: str, online: bool = True) -> str:
+        return self.path(appid, "img") or (self.fetch(appid) if online else "")
+
+    def forget(self, appid: str):
+        """Drop every cached file of `appid`."""
+        prefix = f"{appid}."
+        with self._lock:
+            files = self._load()
+            for name in [n for n in files if n.startswith(prefix)]:
+                del files[name]
+                try:
+                    os.remove(self.root / name)
+                except OSError:
+                    pass
+            self._misses.pop(str(appid), None)
+            self._dirty = True
+
+    def size(self) -> int:
+        with self._lock:
+            return sum(s for s, _ in self._load().values())
+
+    def flush(self):
+        with self._lock:
+            if self._files is not None:
+                self._save()
+
+    def _evict(self):
+        # under self._lock
+        total = sum(s for s, _ in self._files.values())
+        if total <= self.max_bytes:
+            return
+        for name, (size, _) in sorted(self._files.items(), key=lambda kv: kv[1][1]):
+            try:
+                os.remove(self.root / name)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            del self._files[name]
+            total -= size
+            METRICS.count("artwork.evicted")
+            if total <= self.max_bytes:
+                break
+        self._dirty = True
+
+    def _save(self):
+        # under self._lock
+        if not self._dirty:
+            return
+        cutoff = time.time() - ARTWORK_MISS_TTL
+        self._misses = {k: t for k, t in self._misses.items() if t > cutoff}
+        save_json(self.root / "index.json", {"files": self._files, "misses": self._misses})
+        self._dirty = False
+
+
+ARTWORK = ArtworkCache(ARTWORK_DIR)
+
+
+# =========================
+#   FOLDER SNAPSHOT
+# =========================
+def dir_snapshot(path: str):
+    """{name: (size, mtime_ns)} for the plain files directly inside `path`."""
+    snap = {}
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    if e.is_file():
+                        st = e.stat()
+                        snap[e.name] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return snap
+
+
+# =========================
+#   GAME INDEX
+# =========================
+_NON_ALNUM_RX = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _name_key(name: str) -> str:
+    """Search/sort key: accents stripped, casefolded, punctuation collapsed to spaces."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    plain = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM_RX.sub(" ", plain.casefold()).strip()
+
+
+def _trigrams(key: str):
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class GameIndex:
+    """Search index over (appid, name) for the game list.
+
+    Entries live in parallel lists addressed by a stable int, with names
+    pre-normalized once. The sorted order is kept with bisect, app ids have
+    a sorted prefix index and names a trigram inverted index. The trigram
+    index is built in small steps by build_trigrams() and then updated in
+    place. search() ranks results: exact, prefix, word prefix, substring,
+    then fuzzy trigram matches.
+    """
+    FUZZY_MIN_HITS = 20
+    FUZZY_MIN_SCORE = 0.5
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.keys = []
+        self.entry_of = {}
+        self._order = []  # sorted (key, appid, entry)
+        self._order_entries = None
+        self._order_keys = None  # keys in display order, for scans
+        self._pos = None  # entry -> position in order()
+        self._aids = []  # sorted app id strings
+        self._tri = {}  # trigram -> {entries}, covers entries below _tri_cursor
+        self._tri_cursor = 0
+        self.epoch = 0  # bumped whenever entry numbers are reassigned
+
+    def __len__(self):
+        return len(self.entry_of)
+
+    def set_items(self, items) -> bool:
+        """Sync with an iterable of (name, appid); returns True if anything changed."""
+        new = {aid: name for name, aid in items}
+        changed = False
+        for aid in [a for a in self.entry_of if a not in new]:
+            self.remove(aid)
+            changed = True
+        if not self._order and len(new) > 64:
+            self._bulk_load(new)
+            return bool(new) or changed
+        for aid, name in new.items():
+            changed = self.upsert(aid, name) or changed
+        return changed
+
+    def _bulk_load(self, new):
+        rows = sorted((_name_key(name), aid, name) for aid, name in new.items())
+        # Entries are numbered in display order and the key strings are built
+        # from one joined buffer, so scans walk memory sequentially.
+        self.keys = "\n".join(r[0] for r in rows).split("\n") if rows else []
+        self.ids = [r[1] for r in rows]
+        self.names = [r[2] for r in rows]
+        self.entry_of = {aid: e for e, aid in enumerate(self.ids)}
+        self._order = [(self.keys[e], self.ids[e], e) for e in range(len(rows))]
+        self._aids = sorted(self.ids)
+        self._tri, self._tri_cursor = {}, 0
+        self.epoch += 1
+        self._changed()
+
+    def _changed(self):
+        self._order_entries = None
+        self._order_keys = None
+        self._pos = None
+
+    def upsert(self, aid: str, name: str) -> bool:
+        e = self.entry_of.get(aid)
+        if e is None:
+            self.add(aid, name)
+            return True
+        if self.names[e] != name:
+            self.rename(aid, name)
+            return True
+        return False
+
+    def add(self, aid: str, name: str):
+        if aid in self.entry_of:
+            self.rename(aid, name)
+            return
+        e = len(self.ids)
+        self.ids.append(aid)
+        self.names.append(name)
+        self.keys.append(_name_key(name))
+        self.entry_of[aid] = e
+        bisect.insort(self._order, (self.keys[e], aid, e))
+        bisect.insort(self._aids, aid)
+        if self._tri_cursor >= e:
+            self._tri_cursor = e + 1  # index complete: keep it complete
+        self._tri_add(e)
+        self._changed()
+
+    def remove(self, aid: str):
+        e = self.entry_of.pop(aid, None)
+        if e is None: return
+        self._order_remove(e)
+        i = bisect.bisect_left(self._aids, aid)
+        if i < len(self._aids) and self._aids[i] == aid:
+            del self._aids[i]
+        self._tri_discard(e)
+        self._changed()
+        # Entries are never reused; compact once most of the lists are dead.
+        if len(self.ids) > 1024 and len(self.entry_of) < len(self.ids) // 2:
+            live = {a: self.names[x] for a, x in self.entry_of.items()}
+            epoch = self.epoch
+            self.__init__()
+            self.epoch = epoch
+            self._bulk_load(live)
+
+    def rename(self, aid: str, name: str):
+        e = self.entry_of.get(aid)
+        if e is None: return
+        self._order_remove(e)
+        self._tri_discard(e)
+        self.names[e] = name
+        self.keys[e] = _name_key(name)
+        bisect.insort(self._order, (self.keys[e], aid, e))
+        self._tri_add(e)
+        self._changed()
+
+    def _order_remove(self, e):
+        i = bisect.bisect_left(self._order, (self.keys[e], self.ids[e], e))
+        if i < len(self._order) and self._order[i][2] == e:
+            del self._order[i]
+
+    @property
+    def trigrams_ready(self) -> bool:
+        return self._tri_cursor >= len(self.ids)
+
+    def _tri_add(self, e):
+        if e < self._tri_cursor:
+            for g in _trigrams(self.keys[e]):
+                self._tri.setdefault(g, set()).add(e)
+
+    def _tri_discard(self, e):
+        if e < self._tri_cursor:
+            for g in _trigrams(self.keys[e]):
+                post = self._tri.get(g)
+                if post is not None:
+                    post.discard(e)
+                    if not post:
+                        del self._tri[g]
+
+    def build_trigrams(self, budget: float = 0.008) -> bool:
+        """Extend the trigram index for about `budget` seconds; True once complete.
+
+        Meant to be driven from an idle timer so a large index never blocks
+        the GUI; searches fall back to scans until it is ready.
+        """
+        tri, keys, ids, entry_of = self._tri, self.keys, self.ids, self.entry_of
+        deadline = time.perf_counter() + budget
+        e = self._tri_cursor
+        while e < len(ids):
+            if entry_of.get(ids[e]) == e:
+                for g in _trigrams(keys[e]):
+                    post = tri.get(g)
+                    if post is None:
+                        tri[g] = {e}
+                    else:
+                        post.add(e)
+            e += 1
+            if not e % 256 and time.perf_counter() > deadline:
+                break
+        self._tri_cursor = e
+        return self.trigrams_ready
+
+    def order(self):
+        """Live entries in display order."""
+        if self._order_entries is None:
+            self._order_entries = [t[2] for t in self._order]
+        return self._order_entries
+
+    def _okeys(self):
+        if self._order_keys is None:
+            self._order_keys = [t[0] for t in self._order]
+        return self._order_keys
+
+    def _positions(self):
+        if self._pos is None:
+            pos = [0] * len(self.ids)
+            for i, e in enumerate(self.order()):
+                pos[e] = i
+            self._pos = pos
+        return self._pos
+
+    def _prefix_range(self, q):
+        """(lo, mid, hi): order()[lo:mid] has key == q, order()[mid:hi] starts with q."""
+        o = self._order
+        lo = bisect.bisect_left(o, (q,))
+        hi = bisect.bisect_left(o, (q + "\U0010ffff",), lo)
+        return lo, bisect.bisect_left(o, (q + "\x00",), lo, hi), hi
+
+    def _substring(self, q, within, lo, hi):
+        """Entries containing `q` outside the prefix range [lo, hi), in display order."""
+        pos = None
+        if within is not None and len(within) < len(self.entry_of) // 4:
+            cand = within
+        elif len(q) >= 3 and self.trigrams_ready:
+            # Intersect the rarest postings first; fall back to a scan when
+            # even the rarest one is too common to help.
+            posts = [self._tri.get(g) for g in _trigrams(q) if " " not in g[0] + g[2]]
+            if not all(posts):
+                return []
+            posts.sort(key=len)
+            cand = None
+            if posts and len(posts[0]) < len(self.entry_of) // 4:
+                cand = set(posts[0])
+                for p in posts[1:]:
+                    cand &= p
+                    if not cand:
+                        break
+        else:
+            cand = None
+        if cand is not None:
+            keys, pos = self.keys, self._positions()
+            hits = [e for e in cand if q in keys[e] and not lo <= pos[e] < hi]
+            hits.sort(key=pos.__getitem__)
+            return hits
+        order, okeys = self.order(), self._okeys()
+        out = []
+        for a, b in ((0, lo), (hi, len(order))):
+            if a < b:
+                out.extend(itertools.compress(order[a:b], map(operator.contains, okeys[a:b], itertools.repeat(q))))
+        return out
+
+    def search(self, query: str, within=None):
+        """Ranked entries for `query`.
+
+        `within` may be the previous result when the query was only extended;
+        substring matches are then narrowed from it instead of the full index.
+        Either way each rank bucket comes back in display order. Prefix
+        matches are a contiguous slice of the sorted order and never scanned.
+        """
+        q = _name_key(query or "")
+        if not q:
+            return list(self.order())
+        raw = (query or "").strip()
+        order = self.order()
+        lo, mid, hi = self._prefix_range(q)
+        exact, prefix = order[lo:mid], order[mid:hi]
+        others = self._substring(q, within, lo, hi)
+        is_word = list(map(operator.contains, map(self.keys.__getitem__, others), itertools.repeat(" " + q)))
+        word = list(itertools.compress(others, is_word))
+        rest = list(itertools.compress(others, map(operator.not_, is_word)))
+
+        id_exact, id_prefix = [], []
+        if raw.isdigit():
+            e = self.entry_of.get(raw)
+            if e is not None:
+                id_exact.append(e)
+            i = bisect.bisect_left(self._aids, raw)
+            pos = self._positions()
+            while i < len(self._aids) and self._aids[i].startswith(raw):
+                if self._aids[i] != raw:
+                    id_prefix.append(self.entry_of[self._aids[i]])
+                i += 1
+            id_prefix.sort(key=pos.__getitem__)
+
+        fuzzy = []
+        found = hi - lo + len(others)
+        if found < self.FUZZY_MIN_HITS and len(q) >= 3 and not raw.isdigit() and self.trigrams_ready:
+            fuzzy = self._fuzzy(q, set(exact + prefix + others))
+
+        if id_exact or id_prefix:
+            by_id = set(id_exact) | set(id_prefix)
+            return (id_exact + [e for e in exact + prefix if e not in by_id] + id_prefix
+                    + [e for e in word + rest if e not in by_id])
+        return exact + prefix + word + rest + fuzzy
+
+    def _fuzzy(self, q, exclude):
+        grams = _trigrams(q)
+        tri = self._tri
+        counts = Counter()
+        common = max(256, len(self.entry_of) // 50)
+        posts = [p for p in map(tri.get, grams) if p]
+        need = self.FUZZY_MIN_SCORE * len(grams)
+        frequent = [p for p in posts if len(p) > common]
+        if len(frequent) >= need:
+            # Common trigrams alone can qualify an entry (e.g. "prtal"): count them all.
+            for post in posts:
+                counts.update(post)
+        else:
+            # Every match needs a rare trigram, so count those and only look
+            # the common ones up for the entries found; those dominate the cost.
+            for post in posts:
+                if len(post) <= common:
+                    counts.update(post)
+            for post in frequent:
+                for e in counts:
+                    if e in post:
+                        counts[e] += 1
+        keys = self.keys
+        scored = []
+        for e, n in counts.items():
+            if n < need or e in exclude:
+                continue
+            score = n / (len(grams) + len(_trigrams(keys[e])) - n)
+            scored.append((-score, keys[e], e))
+        scored.sort()
+        return [e for _, _, e in scored[:200]]
+
+
+def diff_ranges(big, small, limit: int):
+    """Index ranges of `big` that are missing from `small`.
+
+    Returns [(first, last), ...] if `small` is an ordered subsequence of
+    `big`, or None when it is not or more than `limit` ranges would be needed.
+    """
+    ranges = []
+    j, n = 0, len(small)
+    start = None
+    for i, e in enumerate(big):
+        if j < n and small[j] == e:
+            j += 1
+            if start is not None:
+                ranges.append((start, i - 1))
+                start = None
+                if len(ranges) > limit:
+                    return None
+        elif start is None:
+            start = i
+    if j != n:
+        return None
+    if start is not None:
+        ranges.append((start, len(big) - 1))
+    return ranges if len(ranges) <= limit else None
+
+
+# =========================
+#   LIBRARY
+# =========================
+class Library:
+    """The games found in one Steam folder: catalog, depot index and {appid: meta}.
+
+    meta is {"name": str, "lua": [paths]}. Shared by the tray widget and the CLI.
+    """
+
+    def __init__(self, steam_path: str, catalog_file: Path = CATALOG_FILE, depot_file: Path = DEPOT_INDEX_FILE):
+        self.catalog = LuaCatalog(catalog_file)
+        self.depots = DepotIndex(depot_file)
+        self.games = {}
+        self.set_steam_path(steam_path)
+
+    def set_steam_path(self, steam_path: str):
+        self.steam_path = steam_path
+        self.stplugin = os.path.join(steam_path, "config", "stplug-in")
+        self.depotcache = os.path.join(steam_path, "depotcache")
+        ensure_dir(self.stplugin)
+        ensure_dir(self.depotcache)
+
+    def refresh(self, full: bool = False, changed=None):
+        """Apply the stplug-in delta to self.games.
+
+        `changed` limits the check to those file names; full=True rebuilds
+        from scratch. Returns (touched, added) app-id sets, or (None, None)
+        when everything was rebuilt.
+        """
+        with METRICS.span("refresh_games"):
+            return self._refresh(full, changed)
+
+    def _refresh(self, full, changed):
+        prev = self.games
+        try:
+            if not os.path.isdir(self.stplugin): ensure_dir(self.stplugin)
+            if changed is None:
+                self.depots.scan(self.depotcache)
+            if full or not prev or self.catalog.root != self.stplugin:
+                self.catalog.scan(self.stplugin, full=full)
+                self.games = self._games_from_catalog(prev)
+                return None, None
+            if changed is not None:
+                added, removed = self.catalog.update(self.stplugin, changed)
+            else:
+                added, removed = self.catalog.scan(self.stplugin)
+            if added or removed:
+                self._apply_delta(added, removed)
+            return ({aid for d in (added, removed) for aids in d.values() for aid in aids},
+                    {aid for aids in added.values() for aid in aids})
+        except Exception as ex:
+            METRICS.error("refresh_games", ex)
+            try:
+                self.catalog.scan(self.stplugin, full=True)
+                self.games = self._games_from_catalog(prev)
+            except Exception as ex:
+                METRICS.error("refresh_games", ex, "full rebuild")
+                self.games = {}
+            return None, None
+
+    def _games_from_catalog(self, prev):
+        games = {}
+        for aid, luas in self.catalog.games().items():
+            name = (prev.get(aid) or {}).get("name") or cached_game_name(aid) or f"App {aid}"
+            games[aid] = {"name": name, "lua": sorted(luas)}
+        return games
+
+    def _apply_delta(self, added, removed):
+        games = self.games
+        touched = set()
+        for fp, aids in removed.items():
+            for aid in aids:
+                g = games.get(aid)
+                if not g: continue
+                if fp in g["lua"]: g["lua"].remove(fp)
+                touched.add(aid)
+        for fp, aids in added.items():
+            for aid in aids:
+                g = games.get(aid)
+                if g is None:
+                    g = games[aid] = {"name": cached_game_name(aid) or f"App {aid}", "lua": []}
+                if fp not in g["lua"]:
+                    g["lua"].append(fp)
+                    g["lua"].sort()
+        # Drop emptied games only now, so a re-parsed file keeps its name.
+        for aid in touched:
+            if not games.get(aid, {}).get("lua"):
+                games.pop(aid, None)
+
+    def apply_files(self, paths):
+        """Fold changed stplug-in/depotcache files (imported, removed, restored) into the indexes.
+
+        Returns refresh()'s (touched, added), or None when no lua file was involved.
+        """
+        lua = {os.path.basename(p) for p in paths if is_lua(p)}
+        manifests = {os.path.basename(p) for p in paths if is_manifest(p)}
+        if manifests:
+            self.depots.update(self.depotcache, manifests)
+        return self.refresh(changed=lua) if lua else None
+
+    def unnamed(self, appids=None):
+        ids = self.games.keys() if appids is None else appids
+        return [aid for aid in ids if (self.games.get(aid, {}).get("name") or "").startswith("App ")]
+
+    def game_manifests(self, appid: str, removing=()):
+        """depotcache files owned by `appid`.
+
+        Depots come from the game's lua files (plus a depot named after the
+        app itself). A depot that another game still references is left out
+        unless that game is in `removing` as well.
+        """
+        meta = self.games.get(appid)
+        if not meta: return []
+        gone = set(removing) | {appid}
+        out = []
+        for depot in sorted(self.catalog.depots_of(meta.get("lua") or []) | {appid}):
+            if self.catalog.apps_for_depot(depot) - gone:
+                continue
+            out.extend(os.path.join(self.depotcache, fn) for fn in self.depots.files_for_depot(depot))
+        return out
+
+    def shared_luas(self, appids) -> dict:
+        """{lua path: other app ids} for lua files of `appids` that also declare apps outside it."""
+        sel = set(appids)
+        out = {}
+        for aid in appids:
+            for fp in (self.games.get(aid) or {}).get("lua") or []:
+                v = self.catalog.files.get(fp)
+                others = set(v[3]) - sel if v else set()
+                if others:
+                    out[fp] = sorted(others)
+        return out
+
+    def plan_files(self, appids, with_manifests: bool, keep_shared: bool = True):
+        """Every lua (and optionally manifest) file for `appids`, de-duplicated.
+
+        With keep_shared (deleting), files another, unselected app still
+        needs are left out: a lua that declares that app too, or a manifest
+        of a depot it references. Export passes keep_shared=False.
+        """
+        shared = self.shared_luas(appids) if keep_shared else {}
+        removing = appids if keep_shared else self.games
+        files = {}
+        for aid in appids:
+            meta = self.games.get(aid)
+            if not meta: continue
+            for fp in meta.get("lua") or []:
+                if fp not in shared:
+                    files[fp] = None
+            if with_manifests:
+                for fp in self.game_manifests(aid, removing=removing):
+                    files[fp] = None
+        return list(files)
+
+    def import_job(self, paths, state=None, **kw) -> "ImportJob":
+        state = state or {}
+        kw.setdefault("on_conflict", state.get("import_conflicts", "overwrite"))
+        kw.setdefault("link_mode", state.get("import_link_mode", "auto"))
+        return ImportJob(paths, self.stplugin, self.depotcache, **kw)
+
+
+# =========================
+#   STEAM PROCESS
+# =========================
+STEAM_EXE = "Steam.exe"
+
+
+class ProcessOps(ABC):
+    """What SteamSupervisor needs from the OS: find, kill and start processes by image name."""
+
+    @abstractmethod
+    def pids(self, image: str) -> list:
+        """Ids of the running processes whose image is `image`."""
+
+    @abstractmethod
+    def kill(self, pids):
+        """Terminate `pids` without waiting for them to exit."""
+
+    def launch(self, exe: str, args=()):
+        return subprocess.Popen([exe, *args], cwd=os.path.dirname(exe) or None)
+
+
+class WindowsProcessOps(ProcessOps):
+    _FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+    def pids(self, image):
+        import csv
+        out = subprocess.run(["tasklist", "/FI", f"IMAGENAME eq {image}", "/FO", "CSV", "/NH"],
+                             capture_output=True, text=True, creationflags=self._FLAGS).stdout
+        return [int(row[1]) for row in csv.reader(out.splitlines())
+                if len(row) > 1 and row[0].lower() == image.lower() and row[1].isdigit()]
+
+    def kill(self, pids):
+        args = ["taskkill", "/F"]
+        for pid in pids:
+            args += ["/PID", str(pid)]
+        subprocess.run(args, capture_output=True, creationflags=self._FLAGS)
+
+
+class PosixProcessOps(ProcessOps):
+    """/proc based; matches argv[0] or, for scripts, argv[1]. Reaps the children it started."""
+
+    def __init__(self):
+        self._children = []
+
+    def pids(self, image):
+        self._children = [p for p in self._children if p.poll() is None]
+        want = image.lower()
+        found = []
+        try:
+            entries = os.listdir("/proc")
+        except OSError:
+            return found
+        for name in entries:
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/cmdline", "rb") as f:
+                    argv = f.read().split(b"\0")[:2]
+            except OSError:
+                continue
+            if any(os.path.basename(a.decode("utf-8", "replace")).lower() == want for a in argv if a):
+                found.append(int(name))
+        return found
+
+    def kill(self, pids):
+        import signal
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def launch(self, exe, args=()):
+        proc = super().launch(exe, args)
+        self._children.append(proc)
+        return proc
+
+
+class SteamSupervisor:
+    """Launches and restarts Steam on a worker thread and reports each state change.
+
+    `on_state(state, detail)` runs on the worker thread with state one of
+    "running", "stopping", "starting", "stopped" or "failed". Only one
+    launch/restart runs at a time; a request while busy returns False. The
+    final state is reported after the supervisor is free again.
+    """
+    POLL = 0.25
+
+    def __init__(self, steam_path: str, exe_name: str = STEAM_EXE, ops: ProcessOps = None,
+                 on_state=None, exit_timeout: float = 15, start_timeout: float = 20):
+        self.steam_path = steam_path
+        self.exe_name = exe_name
+        self.ops = ops or (WindowsProcessOps() if sys.platform == "win32" else PosixProcessOps())
+        self.on_state = on_state or (lambda state, detail: None)
+        self.exit_timeout = exit_timeout
+        self.start_timeout = start_timeout
+        self._busy = threading.Lock()
+
+    def set_steam_path(self, steam_path: str):
+        self.steam_path = steam_path
+
+    @property
+    def exe(self) -> str:
+        return os.path.join(self.steam_path, self.exe_name)
+
+    def is_running(self) -> bool:
+        return bool(self.ops.pids(self.exe_name))
+
+    @property
+    def busy(self) -> bool:
+        return self._busy.locked()
+
+    def launch(self) -> bool:
+        """Start Steam unless it is already running."""
+        return self._spawn(False)
+
+    def restart(self) -> bool:
+        """Kill Steam, wait until it has really exited, then start it again."""
+        return self._spawn(True)
+
+    def _spawn(self, restart: bool) -> bool:
+        if not self._busy.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._run, args=(restart,), name="rtool-steam", daemon=True).start()
+        return True
+
+    def _run(self, restart: bool):
+        try:
+            with METRICS.span("steam_restart" if restart else "steam_launch"):
+                state, detail = self._sequence(restart)
+        except Exception as ex:
+            METRICS.error("steam", ex)
+            state, detail = "failed", str(ex)
+        finally:
+            self._busy.release()
+        self.on_state(state, detail)
+
+    def _sequence(self, restart: bool):
+        """Report the intermediate states; return the final (state, detail)."""
+        exe = self.exe
+        if not os.path.exists(exe):
+            return "failed", f"Steam not found:\n{exe}"
+        pids = self.ops.pids(self.exe_name)
+        if pids and not restart:
+            return "running", "Steam is already running"
+        if pids:
+            self.on_state("stopping", "Closing Steam...")
+            self.ops.kill(pids)
+            if not self._wait(lambda: not self.ops.pids(self.exe_name), self.exit_timeout):
+                return "failed", f"Steam did not exit within {self.exit_timeout:g}s"
+            self.on_state("stopped", "Steam closed")
+        self.on_state("starting", "Starting Steam...")
+        self.ops.launch(exe)
+        if self._wait(lambda: bool(self.ops.pids(self.exe_name)), self.start_timeout):
+            return "running", "Steam started"
+        return "failed", f"Steam did not start within {self.start_timeout:g}s"
+
+    def _wait(self, done, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not done():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.POLL)
+        return True
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Single-instance lock and path forwarding between rTool processes.
+
+The first process takes an exclusive lock on instance-<user>.lock and
+listens on a loopback socket whose port and token go into instance-<user>.json. Later processes
+(Explorer starts one per selected item) fail the lock, send their paths to
+that socket and exit. Besides the standard library it needs only
+rtool_core (for rtool_home), which imports no Qt, so forwarding stays
+well under 100 ms.
+"""
+import os, sys, json, socket, threading, time, secrets, hmac
+from pathlib import Path
+
+from rtool_core import rtool_home
+
+
+def _user_tag() -> str:
+    # ProgramData is shared by every account; each user gets their own instance.
+    user = os.getenv("USERNAME") or os.getenv("USER") or ""
+    return "".join(c for c in user if c.isalnum())[:32] or "default"
+
+
+class Instance:
+    """Primary-instance lock plus the server that receives forwarded paths.
+
+    acquire() returns False when another process already owns the lock.
+    `on_paths(list)` is called from the server thread.
+    """
+
+    def __init__(self, home: Path = None):
+        home = Path(home or rtool_home())
+        tag = _user_tag()
+        self.lock_file = home / f"instance-{tag}.lock"
+        self.info_file = home / f"instance-{tag}.json"
+        self._fd = None
+        self._sock = None
+        self._thread = None
+        self._token = ""
+
+    def acquire(self) -> bool:
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.lock_file), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd  # held (never closed) for the life of the process
+        return True
+
+    def serve(self, on_paths):
+        """Start listening; only call after acquire() succeeded."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(64)
+        self._sock = sock
+        self._token = secrets.token_hex(16)
+        tmp = self.info_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"port": sock.getsockname()[1], "token": self._token, "pid": os.getpid()}), "utf-8")
+        os.replace(tmp, self.info_file)
+        self._thread = threading.Thread(target=self._accept, args=(on_paths,), name="rtool-ipc", daemon=True)
+        self._thread.start()
+
+    def _accept(self, on_paths):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            try:
+                with conn:
+                    conn.settimeout(2)
+                    msg = json.loads(_recv_line(conn) or b"{}")
+                    if not hmac.compare_digest(str(msg.get("token", "")), self._token):
+                        continue
+                    paths = [p for p in msg.get("paths") or [] if isinstance(p, str) and p]
+                    conn.sendall(b"ok\n")
+                on_paths(paths)  # [] = a plain second launch; the primary shows itself
+            except Exception:
+                pass
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+            try:
+                self.info_file.unlink()
+            except OSError:
+                pass
+
+    def forward(self, paths, timeout: float = 5.0) -> bool:
+        """Send `paths` to the primary; waits up to `timeout` for it to start listening."""
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while True:
+            try:
+                info = json.loads(self.info_file.read_text("utf-8"))
+                with socket.create_connection(("127.0.0.1", int(info["port"])), timeout=2) as conn:
+                    conn.sendall(json.dumps({"token": info["token"], "paths": list(paths)}).encode("utf-8") + b"\n")
+                    if _recv_line(conn) == b"ok":
+                        return True
+            except (OSError, ValueError, KeyError):
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.25)
+
+
+def _recv_line(conn, limit: int = 1 << 22) -> bytes:
+    buf = b""
+    while b"\n" not in buf and len(buf) < limit:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        buf += chunk
+    return buf.split(b"\n", 1)[0].strip()
@@ -0,0 +1,131 @@
+"""HttpClient and download_file against a local stub server."""
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("RTOOL_HOME", tempfile.mkdtemp(prefix="rtool-test-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rtool_core  # noqa: E402
+
+PAYLOAD = bytes(range(256)) * 1172  # 300032 bytes
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    ranges = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/redirect/"):
+            # GitHub asset URLs answer like this before the CDN serves the file.
+            hops = int(self.path.split("/")[2])
+            target = "/file" if hops <= 1 else f"/redirect/{hops - 1}"
+            self._send(302, b"<html>redirecting</html>", [("Location", target)])
+        elif self.path == "/loop":
+            self._send(307, b"", [("Location", "/loop")])
+        elif self.path == "/see-other":
+            self._send(303, b"", [("Location", "http://127.0.0.1:%d/json" % self.server.server_port)])
+        elif self.path == "/json":
+            self._send(200, b'{"ok": true}', [("Content-Type", "application/json")])
+        elif self.path == "/no-content":
+            self._send(204)
+        elif self.path == "/file":
+            rng = self.headers.get("Range")
+            type(self).ranges.append(rng)
+            if rng:
+                start = int(rng.split("=")[1].rstrip("-"))
+                self._send(206, PAYLOAD[start:], [("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")])
+            else:
+                self._send(200, PAYLOAD)
+        else:
+            self._send(404, b"missing")
+
+
+class HttpStubTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+        cls.base = "http://127.0.0.1:%d" % cls.server.server_port
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        rtool_core.HTTP.close()
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.dest = os.path.join(self.tmp, "setup.exe")
+        _Stub.ranges = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_request_follows_redirects(self):
+        status, body, _ = rtool_core.HTTP.request(self.base + "/redirect/3")
+        self.assertEqual((status, len(body)), (200, len(PAYLOAD)))
+        status, data, _ = rtool_core.HTTP.get_json(self.base + "/see-other")
+        self.assertEqual((status, data), (200, {"ok": True}))
+
+    def test_redirect_limit(self):
+        with self.assertRaises(rtool_core.HttpError) as cm:
+            rtool_core.HTTP.request(self.base + "/loop")
+        self.assertEqual(cm.exception.code, 307)
+
+    def test_download_through_redirect(self):
+        sha = hashlib.sha256(PAYLOAD).hexdigest()
+        rtool_core.download_file(self.base + "/redirect/1", self.dest, len(PAYLOAD), sha)
+        self.assertEqual(self._read(self.dest), PAYLOAD)
+        # Without size or digest the redirect body must not become the installer either.
+        os.remove(self.dest)
+        rtool_core.download_file(self.base + "/redirect/2", self.dest)
+        self.assertEqual(self._read(self.dest), PAYLOAD)
+
+    def test_resume_with_range_through_redirect(self):
+        with open(self.dest + ".part", "wb") as f:
+            f.write(PAYLOAD[:100000])
+        rtool_core.download_file(self.base + "/redirect/1", self.dest, len(PAYLOAD))
+        self.assertEqual(_Stub.ranges, ["bytes=100000-"])
+        self.assertEqual(self._read(self.dest), PAYLOAD)
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+
+    def test_size_and_digest_mismatch(self):
+        with self.assertRaisesRegex(ValueError, "size"):
+            rtool_core.download_file(self.base + "/file", self.dest, len(PAYLOAD) - 1)
+        with self.assertRaisesRegex(ValueError, "SHA-256"):
+            rtool_core.download_file(self.base + "/file", self.dest, len(PAYLOAD), "0" * 64)
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+
+    def test_rejects_other_statuses(self):
+        with self.assertRaises(rtool_core.HttpError) as cm:
+            rtool_core.download_file(self.base + "/no-content", self.dest)
+        self.assertEqual(cm.exception.code, 204)
+        with self.assertRaises(rtool_core.HttpError):
+            rtool_core.download_file(self.base + "/missing", self.dest)
+        self.assertFalse(os.path.exists(self.dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
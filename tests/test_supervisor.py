@@ -0,0 +1,102 @@
+"""SteamSupervisor against a fake Steam executable (POSIX, /proc based)."""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import uuid
+
+os.environ.setdefault("RTOOL_HOME", tempfile.mkdtemp(prefix="rtool-test-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rtool_core  # noqa: E402
+
+
+class _Recorder:
+    """on_state callback that remembers states and signals the end of a sequence."""
+
+    def __init__(self):
+        self.states = []
+        self.done = threading.Event()
+
+    def __call__(self, state, detail):
+        self.states.append(state)
+        if state in ("running", "failed"):
+            self.done.set()
+
+    def wait(self, timeout=10):
+        ok = self.done.wait(timeout)
+        self.done.clear()
+        states, self.states = self.states, []
+        return states if ok else None
+
+
+class _Stubborn(rtool_core.PosixProcessOps):
+    """A Steam that ignores kill."""
+
+    def kill(self, pids):
+        pass
+
+
+@unittest.skipUnless(os.path.isdir("/proc"), "needs /proc")
+class SteamSupervisorTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.name = f"fake_steam_{uuid.uuid4().hex[:8]}"
+        exe = os.path.join(self.dir, self.name)
+        with open(exe, "w") as f:
+            f.write("#!/bin/sh\nwhile :; do sleep 0.1; done\n")
+        os.chmod(exe, 0o755)
+        self.ops = rtool_core.PosixProcessOps()
+        self.rec = _Recorder()
+        self.sup = rtool_core.SteamSupervisor(self.dir, self.name, self.ops, self.rec,
+                                              exit_timeout=3, start_timeout=3)
+
+    def tearDown(self):
+        self.ops.kill(self.ops.pids(self.name))
+        self.ops.pids(self.name)  # reaps
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            rtool_core.ProcessOps()
+
+    def test_launch(self):
+        self.assertFalse(self.sup.is_running())
+        self.assertTrue(self.sup.launch())
+        self.assertEqual(self.rec.wait(), ["starting", "running"])
+        self.assertEqual(len(self.ops.pids(self.name)), 1)
+        # Already running: detected, nothing started.
+        self.assertTrue(self.sup.launch())
+        self.assertEqual(self.rec.wait(), ["running"])
+        self.assertEqual(len(self.ops.pids(self.name)), 1)
+
+    def test_restart_kills_and_relaunches(self):
+        self.sup.launch()
+        self.rec.wait()
+        before = self.ops.pids(self.name)
+        self.assertTrue(self.sup.restart())
+        self.assertFalse(self.sup.restart())  # busy: a second request is refused
+        self.assertFalse(self.sup.launch())
+        self.assertEqual(self.rec.wait(), ["stopping", "stopped", "starting", "running"])
+        after = self.ops.pids(self.name)
+        self.assertEqual(len(after), 1)
+        self.assertNotEqual(after, before)
+        self.assertFalse(self.sup.busy)
+
+    def test_kill_timeout(self):
+        self.sup.launch()
+        self.rec.wait()
+        stubborn = rtool_core.SteamSupervisor(self.dir, self.name, _Stubborn(), self.rec, exit_timeout=0.5)
+        self.assertTrue(stubborn.restart())
+        self.assertEqual(self.rec.wait(), ["stopping", "failed"])
+
+    def test_missing_executable(self):
+        sup = rtool_core.SteamSupervisor(os.path.join(self.dir, "nowhere"), self.name, self.ops, self.rec)
+        self.assertTrue(sup.launch())
+        self.assertEqual(self.rec.wait(), ["failed"])
+
+
+if __name__ == "__main__":
+    unittest.main()